@@ -0,0 +1,162 @@
+"""Local batch file output, announced to targets with SDK-style BATCH messages."""
+
+import gzip
+import json
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, Optional
+from urllib.parse import urlparse
+
+from tap_mailjet.arrow import arrow_schema, page_to_record_batch
+
+DEFAULT_BATCH_SIZE_ROWS = 100000
+BATCH_FORMATS = ("jsonl", "parquet")
+BATCH_COMPRESSIONS = {
+    "jsonl": ("gzip", "none"),
+    "parquet": ("gzip", "none", "snappy", "zstd"),
+}
+
+
+class BatchMessage:
+    """Singer BATCH message pointing the target at finished batch files."""
+
+    def __init__(self, stream: str, encoding: dict, manifest: list) -> None:
+        """Initialize the message for `stream` with the given file URIs."""
+        self.stream = stream
+        self.encoding = encoding
+        self.manifest = manifest
+
+    def asdict(self) -> dict:
+        """Return the message as a dict, as expected by `singer.write_message`."""
+        return {
+            "type": "BATCH",
+            "stream": self.stream,
+            "encoding": self.encoding,
+            "manifest": self.manifest,
+        }
+
+
+def _storage_root(root: str) -> Path:
+    """Return the local directory for a `file://` URI or a plain path."""
+    parsed = urlparse(root)
+    if parsed.scheme == "file":
+        return Path(parsed.netloc + parsed.path)
+    if parsed.scheme:
+        raise ValueError(f"Unsupported batch storage root '{root}'.")
+    return Path(root)
+
+
+class BatchWriter:
+    """Write pages of records to local files, rotating by row count and size.
+
+    Rotation only happens between pages, so a finished file always holds whole
+    pages and the stream can safely emit its STATE right after the BATCH message.
+    """
+
+    def __init__(
+        self,
+        stream_name: str,
+        batch_config: dict,
+        schema: dict,
+        properties: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Initialize the writer from the tap's `batch_config` setting.
+
+        Parquet files hold the given `properties` of `schema`, or all of them.
+        """
+        encoding = batch_config.get("encoding") or {}
+        storage = batch_config.get("storage") or {}
+        self.stream_name = stream_name
+        self.schema = schema
+        self.properties = properties
+        self.format = encoding.get("format", "jsonl")
+        if self.format not in BATCH_FORMATS:
+            raise ValueError(f"Unsupported batch format '{self.format}'.")
+        self.compression = encoding.get("compression", "gzip")
+        if self.compression not in BATCH_COMPRESSIONS[self.format]:
+            raise ValueError(
+                f"Unsupported compression '{self.compression}' "
+                f"for batch format '{self.format}'."
+            )
+        self.root = _storage_root(storage.get("root", "output"))
+        self.prefix = storage.get("prefix", "")
+        self.batch_size_rows = batch_config.get(
+            "batch_size_rows", DEFAULT_BATCH_SIZE_ROWS
+        )
+        self.batch_size_bytes = batch_config.get("batch_size_bytes")
+        self._file: Any = None
+        self._path: Optional[Path] = None
+        self._arrow_schema: Any = None
+        self._rows = 0
+        self._bytes = 0
+
+    @property
+    def encoding(self) -> dict:
+        """Return the `encoding` block announced in BATCH messages."""
+        return {"format": self.format, "compression": self.compression}
+
+    @property
+    def is_full(self) -> bool:
+        """Return True once the open file reached its row or byte budget."""
+        if self._rows >= self.batch_size_rows:
+            return True
+        return bool(self.batch_size_bytes and self._bytes >= self.batch_size_bytes)
+
+    def write_page(self, records: list) -> None:
+        """Append one page of records to the open batch file.
+
+        JSONL pages are expected to be conformed already. Parquet pages may be raw
+        API rows, as they are converted column by column with the stream schema.
+        """
+        if not records:
+            return
+        if self._file is None:
+            self._open()
+        if self.format == "parquet":
+            self._write_parquet(records)
+        else:
+            data = "".join(json.dumps(r, default=str) + "\n" for r in records)
+            encoded = data.encode("utf-8")
+            self._file.write(encoded)
+            self._bytes += len(encoded)
+        self._rows += len(records)
+
+    def close_file(self) -> Optional[str]:
+        """Close the open batch file and return its URI, if anything was written."""
+        if self._file is None or self._path is None:
+            return None
+        self._file.close()
+        uri = self._path.resolve().as_uri()
+        self._file = None
+        self._path = None
+        self._rows = 0
+        self._bytes = 0
+        return uri
+
+    def _open(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        name = f"{self.prefix}{self.stream_name}-{uuid.uuid4().hex}"
+        if self.format == "parquet":
+            self._path = self.root / f"{name}.parquet"
+            self._open_parquet()
+        elif self.compression == "gzip":
+            self._path = self.root / f"{name}.jsonl.gz"
+            self._file = gzip.open(self._path, "wb")
+        else:
+            self._path = self.root / f"{name}.jsonl"
+            self._file = open(self._path, "wb")
+
+    def _open_parquet(self) -> None:
+        if self._arrow_schema is None:
+            self._arrow_schema = arrow_schema(self.schema, self.properties)
+        import pyarrow.parquet as pq
+
+        compression = None if self.compression == "none" else self.compression
+        self._file = pq.ParquetWriter(
+            str(self._path), self._arrow_schema, compression=compression
+        )
+
+    def _write_parquet(self, records: list) -> None:
+        batch = page_to_record_batch(records, self._arrow_schema)
+        self._file.write_batch(batch)
+        self._bytes += batch.nbytes
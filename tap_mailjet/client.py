@@ -1,60 +1,765 @@
 """REST client handling, including mailjetStream base class."""
 
+import datetime
+import heapq
+import json
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Iterable
+from typing import Any, ContextManager, Dict, Iterator, Optional, Iterable, List, Tuple
 
+import singer
 from mailjet_rest import Client
 
+from singer_sdk.helpers._state import finalize_state_progress_markers
+from singer_sdk.helpers._util import utc_now
 from singer_sdk.streams import Stream
 
+from tap_mailjet.arrow import arrow_schema, page_to_record_batch
+from tap_mailjet.batch import BatchMessage, BatchWriter
+from tap_mailjet.memory import MemoryGovernor, bounded_pages
+from tap_mailjet.passthrough import decode_response, format_record_message
+from tap_mailjet.profiling import SyncProfiler
+from tap_mailjet.rollups import RollupAggregator
+from tap_mailjet.scheduler import SYNC_STATS_KEY, RateLimiter
+from tap_mailjet.shards import SHARD_STATE_KEY, Shard
+from tap_mailjet.storage import dump_json, load_json, local_state_path
+from tap_mailjet.webhook import EventLog
+from tap_mailjet.windows import Window, WindowPlanner, format_ts, normalize_ts, parse_ts
+
 
 SCHEMAS_DIR = Path(__file__).parent / Path("./schemas")
 
+# Serializes stdout messages and state updates of streams synced concurrently
+OUTPUT_LOCK = threading.RLock()
+# Number of spread-out offsets or time windows requested in parallel per stream
+# when sampling
+SAMPLE_REQUESTS = 4
+
+
+def _first_records(pages: Iterable[List[dict]], count: int) -> Iterator[List[dict]]:
+    """Return pages holding the first `count` records of `pages`, then stop."""
+    for page in pages:
+        if len(page) >= count:
+            yield page[:count]
+            return
+        count -= len(page)
+        yield page
+
+
+@contextmanager
+def _no_profiling() -> Iterator[None]:
+    yield
+
+
 class mailjetStream(Stream):
     """Stream class for mailjet streams."""
-    page = 0
     limit = 1000
     # Request parameter used for filtering the replication state
     replication_request_param = None
     # Additional request params to be sent with the request
     request_params = None
+    # API resource to page through, if it differs from the stream name
+    resource = None
+    # Whether API records are emitted unchanged, which `raw_passthrough` requires
+    supports_passthrough = True
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._passthrough = False
         api_key = self.config.get("api_key")
         api_secret = self.config.get("api_secret")
         self.conn = Client(
             auth=(api_key, api_secret),
             version = 'v3'
         )
-        self.client = getattr(self.conn, self.name)
+        self.client = getattr(self.conn, self.resource or self.name)
+        self.shard = Shard.from_config(self.config)
 
-    def get_records(self, context: Optional[dict]) -> Iterable[dict]:
-        """Return a generator of row-type dictionary objects.
-
-        The optional `context` argument is used to identify a specific slice of the
-        stream if partitioning is required for the stream. Most implementations do not
-        require partitioning and should ignore the `context` argument.
-        """
-        filters = {
-            'Limit': 1000
+    def get_pages(self, context: Optional[dict]) -> Iterable[List[dict]]:
+        """Return a generator of record pages, one list per API response."""
+        filters: Dict[str, Any] = {
+            'Limit': self.limit
         }
         if self.replication_key and self.replication_request_param:
             filters[self.replication_request_param] = self.get_starting_replication_key_value(context)
         if self.request_params:
             filters.update(self.request_params)
 
+        if self.shard is not None and self.replication_request_param:
+            start, end = self.get_time_range(context)
+            if start >= end:
+                self.logger.info(f"Shard slice of '{self.name}' is already synced.")
+                return
+            filters[self.replication_request_param] = format_ts(start)
+            filters['ToTS'] = format_ts(end)
+
         self.logger.info(filters)
         self.logger.info(self.get_starting_replication_key_value(context))
 
+        if self.config.get("sample_size"):
+            yield from self.get_sample_pages(filters, context)
+        elif self.config.get("window_target_rows") and self.replication_request_param:
+            for window_start, window_end in self.get_windows(context):
+                filters[self.replication_request_param] = format_ts(window_start)
+                filters['ToTS'] = format_ts(window_end)
+                yield from self._paginate(filters)
+        elif self.shard is not None and not self.replication_request_param:
+            # Pages are striped across shards, which needs a stable order
+            filters.setdefault('Sort', 'ID ASC')
+            yield from self._paginate(filters, self.shard)
+        else:
+            yield from self._paginate(filters)
+
+    def _paginate(
+        self, filters: dict, shard: Optional[Shard] = None, endpoint: Any = None
+    ) -> Iterable[List[dict]]:
+        """Return a generator of pages for the given filters, following offsets.
+
+        With a `shard`, only the pages owned by that shard are requested. Pages are
+        requested from the stream's resource unless another `endpoint` is given.
+        """
+        page = shard.index if shard else 0
         has_more = True
         while has_more:
-            filters['Offset'] = self.page * self.limit
-            res = self.client.get(filters=filters)
-            data = res.json()
-            for row in data['Data']:
-                yield row
+            filters['Offset'] = page * self.limit
+            with self.profile_phase("http"):
+                res = self.request(endpoint or self.client, filters=filters)
+            with self.profile_phase("json_decode"):
+                data = decode_response(res.text) if self._passthrough else res.json()
+            yield data['Data']
 
-            self.page += 1
+            page += shard.count if shard else 1
             has_more = data.get('Count', 0) == self.limit
 
+    def get_sample_pages(
+        self, filters: dict, context: Optional[dict]
+    ) -> Iterable[List[dict]]:
+        """Return pages of records sampled from spread-out time windows or offsets.
+
+        The sample requests are sent in parallel, each asking for a share of the
+        configured `sample_size`.
+        """
+        limit = max(1, math.ceil(self.config["sample_size"] / SAMPLE_REQUESTS))
+        start = None
+        if self.replication_request_param:
+            start, end = self.get_time_range(context)
+        if start is not None:
+            width = (end - start) / SAMPLE_REQUESTS
+            sample_filters = [
+                dict(
+                    filters,
+                    Limit=limit,
+                    Offset=0,
+                    **{
+                        self.replication_request_param: format_ts(start + width * i),
+                        'ToTS': format_ts(start + width * (i + 1)),
+                    }
+                )
+                for i in range(SAMPLE_REQUESTS)
+            ]
+        else:
+            data = self.request(self.client, filters=dict(filters, countOnly=1)).json()
+            total = data.get('Total', data.get('Count', 0))
+            offsets = sorted(
+                {total * i // SAMPLE_REQUESTS for i in range(SAMPLE_REQUESTS)}
+            )
+            sample_filters = [
+                dict(filters, Limit=limit, Offset=offset) for offset in offsets
+            ]
+
+        def fetch(sample_filter: dict) -> List[dict]:
+            with self.profile_phase("http"):
+                res = self.request(self.client, filters=sample_filter)
+            with self.profile_phase("json_decode"):
+                return res.json().get('Data', [])
+
+        with ThreadPoolExecutor(max_workers=SAMPLE_REQUESTS) as executor:
+            pages = list(executor.map(fetch, sample_filters))
+        for page in pages:
+            if page:
+                yield page
+
+    def request(self, endpoint: Any, **kwargs: Any) -> Any:
+        """Send a GET request to `endpoint` within the tap's global rate budget."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return endpoint.get(**kwargs)
+
+    def count_rows(self, from_ts: datetime.datetime, to_ts: datetime.datetime) -> int:
+        """Return the number of rows between two timestamps, without fetching them."""
+        filters = dict(self.request_params or {})
+        filters.update({
+            'countOnly': 1,
+            self.replication_request_param: format_ts(from_ts),
+            'ToTS': format_ts(to_ts),
+        })
+        data = self.request(self.client, filters=filters).json()
+        return data.get('Total', data.get('Count', 0))
+
+    def get_time_range(
+        self, context: Optional[dict]
+    ) -> Tuple[Optional[datetime.datetime], datetime.datetime]:
+        """Return the period to extract, from the bookmark until now.
+
+        When sharding, the period is restricted to this shard's time slice.
+        """
+        start_value = self.get_starting_replication_key_value(context)
+        start = parse_ts(start_value) if start_value else None
+        if self.shard is None:
+            return start, datetime.datetime.now(datetime.timezone.utc)
+        slice_start, slice_end = self.shard.time_slice()
+        return max(start or slice_start, slice_start), slice_end
+
+    def get_windows(self, context: Optional[dict]) -> List[Window]:
+        """Plan density-aware request windows from the bookmark until now.
+
+        The plan is cached in the stream state so later runs, e.g. after an
+        interrupted backfill, only probe the period after the previous plan.
+        """
+        start, end = self.get_time_range(context)
+        if start is None:
+            raise ValueError(
+                f"Stream '{self.name}' needs a start_date or bookmark to plan windows."
+            )
+        planner = WindowPlanner(
+            self.count_rows,
+            target_rows=self.config["window_target_rows"],
+            min_window=datetime.timedelta(
+                seconds=self.config.get("window_min_seconds", 3600)
+            ),
+        )
+        state = self.get_context_state(context)
+        windows, state["window_plan"] = planner.plan_with_cache(
+            start, end, state.get("window_plan")
+        )
+        self.logger.info(
+            f"Planned {len(windows)} request windows for '{self.name}' "
+            f"between {format_ts(start)} and {format_ts(end)}."
+        )
+        return windows
+
+    def get_records(self, context: Optional[dict]) -> Iterable[dict]:
+        """Return a generator of row-type dictionary objects.
+
+        The optional `context` argument is used to identify a specific slice of the
+        stream if partitioning is required for the stream. Most implementations do not
+        require partitioning and should ignore the `context` argument.
+
+        In memory-bounded mode, a page is only fetched once it fits into the
+        tap's global budget, and is released after all its records were written.
+        """
+        for page in self.get_bounded_pages(context):
+            for row in page:
+                yield row
+
+    def get_bounded_pages(self, context: Optional[dict]) -> Iterable[List[dict]]:
+        """Return `get_pages`, within the memory budget and sample size if set."""
+        pages = self.get_pages(context)
+        if self.config.get("sample_size"):
+            pages = _first_records(pages, self.config["sample_size"])
+        return bounded_pages(self.memory_governor, pages, self.limit)
+
+    @property
+    def selected_properties(self) -> List[str]:
+        """Return the names of the selected top-level properties."""
+        return [
+            name for name in self.schema["properties"]
+            if self.mask.get(("properties", name), True)
+        ]
+
+    def get_record_batches(self, context: Optional[dict]) -> Iterable[Any]:
+        """Return a generator of Arrow record batches, one per API page.
+
+        Columns are typed from the stream schema and limited to selected properties,
+        so consumers like DuckDB or Parquet writers can use the batches directly.
+        """
+        schema = arrow_schema(self.schema, self.selected_properties)
+        for page in self.get_bounded_pages(context):
+            yield page_to_record_batch(page, schema)
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        """Return the tap's global rate limiter, if a request rate budget is set."""
+        return getattr(self._tap, "rate_limiter", None)
+
+    @property
+    def memory_governor(self) -> Optional[MemoryGovernor]:
+        """Return the tap's memory governor, if memory-bounded mode is enabled."""
+        return getattr(self._tap, "memory_governor", None)
+
+    @property
+    def profiler(self) -> Optional[SyncProfiler]:
+        """Return the tap's profiler, if profiling is enabled."""
+        return getattr(self._tap, "profiler", None)
+
+    def profile_phase(self, phase: str) -> ContextManager:
+        """Return a context manager timing a phase of this stream when profiling."""
+        if self.profiler is None:
+            return _no_profiling()
+        return self.profiler.phase(self.name, phase)
+
+    @property
+    def raw_passthrough(self) -> bool:
+        """Return whether records can be written as returned by the API.
+
+        This requires `raw_passthrough`, all properties selected, no stream maps
+        and a stream emitting API records unchanged.
+        """
+        return bool(
+            self.config.get("raw_passthrough")
+            and self.supports_passthrough
+            and not self.config.get("stream_maps")
+            and not self.config.get("batch_config")
+            and len(self.selected_properties) == len(self.schema["properties"])
+        )
+
+    def _sync_records(self, context: Optional[dict] = None) -> None:
+        """Sync records, writing batch files instead of RECORD messages if set."""
+        self._sync_started_at = time.monotonic()
+        self._passthrough = self.raw_passthrough
+        self._schema_properties = set(self.schema["properties"])
+        self._write_shard_state(completed=False)
+        if self.profiler is None:
+            self._sync_records_unprofiled(context)
+            return
+        with self.profiler.profile_stream(self.name):
+            self._sync_records_unprofiled(context)
+
+    def _sync_records_unprofiled(self, context: Optional[dict]) -> None:
+        if self.config.get("batch_config"):
+            self._sync_batches(context)
+        else:
+            super()._sync_records(context)
+
+    def _write_record_message(self, record: dict) -> None:
+        """Write out a RECORD message, timing conformance and output when profiling.
+
+        In passthrough mode, records holding only schema properties are written
+        from their raw JSON text, skipping conformance and re-encoding.
+        """
+        raw_json = getattr(record, "raw_json", None)
+        if (
+            raw_json is not None
+            and self._passthrough
+            and record.keys() <= self._schema_properties
+        ):
+            line = format_record_message(self.name, raw_json, utc_now())
+            with self.profile_phase("stdout"), OUTPUT_LOCK:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            return
+        if self.profiler is None:
+            record_messages = list(self._generate_record_messages(record))
+            with OUTPUT_LOCK:
+                for record_message in record_messages:
+                    singer.write_message(record_message)
+            return
+        with self.profile_phase("conform"):
+            record_messages = list(self._generate_record_messages(record))
+        with self.profile_phase("stdout"), OUTPUT_LOCK:
+            for record_message in record_messages:
+                singer.write_message(record_message)
+
+    def _write_schema_message(self) -> None:
+        with OUTPUT_LOCK:
+            super()._write_schema_message()
+
+    def _write_state_message(self) -> None:
+        # Samples are not a complete sync, so they must not move any bookmark
+        if self.config.get("sample_size"):
+            return
+        with OUTPUT_LOCK:
+            super()._write_state_message()
+
+    def _increment_stream_state(
+        self, latest_record: dict, *, context: Optional[dict] = None
+    ) -> None:
+        with OUTPUT_LOCK:
+            super()._increment_stream_state(latest_record, context=context)
+
+    def _write_record_count_log(
+        self, record_count: int, context: Optional[dict]
+    ) -> None:
+        """Log the record count and keep sync statistics in state for scheduling."""
+        super()._write_record_count_log(record_count=record_count, context=context)
+        with OUTPUT_LOCK:
+            self.stream_state[SYNC_STATS_KEY] = {
+                "duration_seconds": round(time.monotonic() - self._sync_started_at, 3),
+                "record_count": record_count,
+            }
+        self._write_shard_state(completed=True)
+
+    def _write_shard_state(self, completed: bool) -> None:
+        """Keep the shard's slice and progress in state for merging shard states."""
+        if self.shard is None:
+            return
+        with OUTPUT_LOCK:
+            self.stream_state[SHARD_STATE_KEY] = self.shard.state(
+                time_sliced=bool(self.replication_request_param), completed=completed
+            )
+
+    def _sync_batches(self, context: Optional[dict]) -> None:
+        """Write each page to local batch files and announce them with BATCH messages.
+
+        STATE messages are only emitted right after the files holding the
+        corresponding records were announced, so state never runs ahead of data.
+        """
+        batch_config = self.config["batch_config"]
+        # Parquet pages are converted column-wise from the raw rows, skipping the
+        # per-record conformance of the JSONL path. Stream maps need conformed
+        # records though, so mapped streams take the JSONL path into Parquet.
+        columnar = (
+            (batch_config.get("encoding") or {}).get("format") == "parquet"
+            and not self.config.get("stream_maps")
+        )
+        writers: Dict[str, BatchWriter] = {}
+        record_count = 0
+        self._write_starting_replication_value(context)
+        for page in self.get_bounded_pages(context):
+            self._check_max_record_limit(record_count)
+            with self.profile_phase("conform"):
+                if columnar:
+                    page_records = {self.name: page}
+                else:
+                    page_records = self._generate_page_records(page)
+            for record in page:
+                self._increment_stream_state(record, context=context)
+                record_count += 1
+
+            for stream_alias, records in page_records.items():
+                if stream_alias not in writers:
+                    writers[stream_alias] = self._batch_writer(
+                        stream_alias, batch_config
+                    )
+                with self.profile_phase("batch_write"):
+                    writers[stream_alias].write_page(records)
+            if any(writer.is_full for writer in writers.values()):
+                self._write_batch_messages(writers)
+                self._write_state_message()
+
+        self._write_batch_messages(writers)
+        if not context:
+            finalize_state_progress_markers(self.stream_state)
+        self._write_record_count_log(record_count=record_count, context=context)
+        self._write_state_message()
+
+    def _batch_writer(self, stream_alias: str, batch_config: dict) -> BatchWriter:
+        """Return a writer for the records of `stream_alias`, in its mapped schema."""
+        if not self.config.get("stream_maps"):
+            return BatchWriter(
+                stream_alias,
+                batch_config,
+                self.schema,
+                properties=self.selected_properties,
+            )
+        schema = next(
+            stream_map.transformed_schema
+            for stream_map in self.stream_maps
+            if stream_map.stream_alias == stream_alias
+        )
+        return BatchWriter(stream_alias, batch_config, schema)
+
+    def _generate_page_records(self, page: List[dict]) -> Dict[str, List[dict]]:
+        """Return the conformed and mapped records of a page, by stream alias."""
+        page_records: Dict[str, List[dict]] = {}
+        for record in page:
+            for record_message in self._generate_record_messages(record):
+                page_records.setdefault(record_message.stream, []).append(
+                    record_message.record
+                )
+        return page_records
+
+    def _write_batch_messages(self, writers: Dict[str, BatchWriter]) -> None:
+        """Close the open batch files and emit one BATCH message per file."""
+        for stream_alias, writer in writers.items():
+            with self.profile_phase("batch_write"):
+                uri = writer.close_file()
+            if uri:
+                with self.profile_phase("stdout"), OUTPUT_LOCK:
+                    singer.write_message(
+                        BatchMessage(stream_alias, writer.encoding, [uri])
+                    )
+
+
+class DescendingScanStream(mailjetStream):
+    """Stream class for resources the API cannot filter by modification time.
+
+    With `client_side_incremental` enabled, the modification timestamp becomes the
+    replication key: pages are requested newest first and paging stops at the
+    first row behind the bookmark, as all further rows are older still.
+    """
+    # Record field holding the modification timestamp
+    modified_field: str = ""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.config.get("client_side_incremental"):
+            self.replication_key = self.modified_field
+            self.request_params = dict(
+                self.request_params or {}, Sort=f'{self.modified_field} DESC'
+            )
+
+    def get_pages(self, context: Optional[dict]) -> Iterable[List[dict]]:
+        """Return pages of rows modified at or after the bookmark, newest first."""
+        start_value = None
+        if self.replication_key:
+            start_value = self.get_starting_replication_key_value(context)
+        if not start_value:
+            yield from super().get_pages(context)
+            return
+        bookmark = parse_ts(start_value)
+        for page in super().get_pages(context):
+            # Rows without a modification timestamp cannot be placed relative to
+            # the bookmark, so they are always emitted and never end the scan
+            changed = []
+            reached_bookmark = False
+            for row in page:
+                modified = row.get(self.modified_field)
+                if modified and parse_ts(modified) < bookmark:
+                    reached_bookmark = True
+                else:
+                    changed.append(row)
+            if changed:
+                yield changed
+            if reached_bookmark:
+                self.logger.info(
+                    f"Reached rows modified before {start_value}, stopping."
+                )
+                return
+
+    def _increment_stream_state(
+        self, latest_record: dict, *, context: Optional[dict] = None
+    ) -> None:
+        # Rows without a modification timestamp leave the bookmark unchanged
+        if self.replication_key and not latest_record.get(self.replication_key):
+            return
+        super()._increment_stream_state(latest_record, context=context)
+
+
+class ContentStream(mailjetStream):
+    """Stream class for the full content of templates and campaign drafts.
+
+    The parent resource is paged for its metadata, and content is only fetched,
+    in parallel, for IDs whose modification timestamp changed since the last run
+    according to a local index.
+    """
+    # Parent record field that changes whenever the content changes
+    modified_field: str = ""
+    content_concurrency = 4
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.content_client = getattr(self.conn, f"{self.resource}_detailcontent")
+        self.index_path = local_state_path(self.config, f"{self.name}_index.json")
+
+    def get_pages(self, context: Optional[dict]) -> Iterable[List[dict]]:
+        """Return pages of content records for changed parents only."""
+        index = load_json(self.index_path, {})
+        fetched = 0
+        for page in super().get_pages(context):
+            changed = [
+                row for row in page
+                if index.get(str(row['ID'])) != row.get(self.modified_field)
+            ]
+            records = []
+            for row, content in zip(changed, self._fetch_contents(changed)):
+                if content is None:
+                    continue
+                records.append(self._content_record(row, content))
+                index[str(row['ID'])] = row.get(self.modified_field)
+            fetched += len(changed)
+            yield records
+        if fetched and not self.config.get("sample_size"):
+            dump_json(self.index_path, index)
+        self.logger.info(
+            f"Fetched content of {fetched} changed '{self.resource}' records."
+        )
+
+    def _fetch_contents(self, rows: List[dict]) -> List[Optional[dict]]:
+        """Fetch the detail content of `rows` concurrently, None where unavailable."""
+        def fetch(row: dict) -> Optional[dict]:
+            with self.profile_phase("http"):
+                res = self.request(self.content_client, id=row['ID'])
+            if res.status_code != 200:
+                self.logger.warning(
+                    f"Could not fetch content of {self.resource} {row['ID']}: "
+                    f"HTTP {res.status_code}"
+                )
+                return None
+            data = res.json().get('Data') or [{}]
+            return data[0]
+
+        if not rows:
+            return []
+        workers = (
+            self.config.get("content_fetch_concurrency") or self.content_concurrency
+        )
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(fetch, rows))
+
+    def _content_record(self, row: dict, content: dict) -> dict:
+        mjml = content.get('MJMLContent')
+        if mjml is not None and not isinstance(mjml, str):
+            mjml = json.dumps(mjml)
+        return {
+            'ID': row['ID'],
+            self.modified_field: row.get(self.modified_field),
+            'Headers': content.get('Headers'),
+            'Html-part': content.get('Html-part'),
+            'Text-part': content.get('Text-part'),
+            'MJMLContent': mjml,
+        }
+
+
+class RollupSourceStream(mailjetStream):
+    """Stream class whose rows are counted into per-campaign, per-day rollups.
+
+    Counts are only applied once all pages were read, so an interrupted sync
+    leaves the rollups untouched.
+    """
+    # Rollup column the rows of this stream are counted into
+    rollup_metric: str = ""
+    # Column referencing the message of rows without a CampaignID column
+    rollup_message_field: Optional[str] = None
+
+    @property
+    def rollups(self) -> Optional[RollupAggregator]:
+        """Return the tap's rollup aggregator, if rollups are enabled."""
+        return getattr(self._tap, "rollups", None)
+
+    def get_pages(self, context: Optional[dict]) -> Iterable[List[dict]]:
+        """Return pages of rows, counting them into the rollups."""
+        if self.rollups is None or self.config.get("sample_size"):
+            yield from super().get_pages(context)
+            return
+        update = self.rollups.start(self.rollup_metric)
+        for page in super().get_pages(context):
+            with self.profile_phase("rollup"):
+                message_field = self.rollup_message_field
+                for row in page:
+                    update.add(
+                        row.get('ID'),
+                        row.get(self.replication_key),
+                        row.get('CampaignID'),
+                        row.get(message_field) if message_field else None,
+                    )
+            yield page
+        self.rollups.commit(update)
+
+
+class RollupStream(mailjetStream):
+    """Stream class emitting the rollup buckets changed by this run's syncs.
+
+    The rollups are fed by the message, open, click and bounce streams, so this
+    stream is synced after them.
+    """
+    replication_key = None
+
+    def get_pages(self, context: Optional[dict]) -> Iterable[List[dict]]:
+        """Return pages of the changed buckets with their updated totals."""
+        rollups = getattr(self._tap, "rollups", None)
+        if rollups is None:
+            return
+        rows = rollups.changed_rows()
+        for start in range(0, len(rows), self.limit):
+            yield rows[start:start + self.limit]
+        if not self.config.get("sample_size"):
+            rollups.mark_emitted(rows)
+
+
+class EventSource:
+    """A resource merged into a `MergedEventStream`."""
+
+    def __init__(self, resource: str, timestamp_field: str, event_type: str) -> None:
+        """Read `resource` sorted by `timestamp_field`, as events of `event_type`."""
+        self.resource = resource
+        self.timestamp_field = timestamp_field
+        self.event_type = event_type
+
+
+class MergedEventStream(mailjetStream):
+    """Stream class merging several event resources into one, ordered by time.
+
+    Every source is paginated sorted by its timestamp, and the sources are merged
+    lazily with a k-way merge, so events come out in time order in a single pass
+    while only one page per source is held in memory. All sources share one
+    bookmark on `EventAt`.
+    """
+    sources: List[EventSource] = []
+    replication_key = "EventAt"
+    replication_request_param = "FromTS"
+    is_sorted = True
+
+    def get_pages(self, context: Optional[dict]) -> Iterable[List[dict]]:
+        """Return pages of events from all sources, ordered by event time."""
+        start, end = self.get_time_range(context)
+        if start is not None and start >= end:
+            return
+        # All sources share the same upper bound, so no source runs ahead of the
+        # bookmark with events the others have not seen yet
+        filters = {'Limit': self.limit, 'ToTS': format_ts(end)}
+        if start is not None:
+            filters[self.replication_request_param] = format_ts(start)
+        events = heapq.merge(
+            *[self._source_events(source, dict(filters)) for source in self.sources],
+            key=lambda event: event['EventAt'],
+        )
+        page: List[dict] = []
+        for event in events:
+            page.append(event)
+            if len(page) >= self.limit:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def _source_events(self, source: EventSource, filters: dict) -> Iterator[dict]:
+        """Return the events of one source, in time order."""
+        filters['Sort'] = f'{source.timestamp_field} ASC'
+        endpoint = getattr(self.conn, source.resource)
+        properties = self.schema['properties']
+        for page in self._paginate(filters, endpoint=endpoint):
+            for row in page:
+                event_at = normalize_ts(row.get(source.timestamp_field))
+                if event_at is None:
+                    continue
+                event = {key: value for key, value in row.items() if key in properties}
+                event.update(EventType=source.event_type, EventAt=event_at)
+                yield event
+
+
+class EventLogStream(mailjetStream):
+    """Stream class for Event API webhooks stored by `tap-mailjet-receiver`.
+
+    Events are read from the receiver's on-disk log instead of polling the API,
+    using the log offset as replication key.
+    """
+    # Value of the `event` field of the webhook payloads in this stream
+    event_type: str = ""
+    replication_key = "Offset"
+    is_sorted = True
+
+    def get_pages(self, context: Optional[dict]) -> Iterable[List[dict]]:
+        """Return pages of events logged after the bookmarked offset."""
+        # The SDK seeds the starting value with `start_date`, so read the bookmark
+        state = self.get_context_state(context)
+        last_offset = state.get('replication_key_value')
+        from_offset = 0 if last_offset is None else int(last_offset) + 1
+        event_log = EventLog(Path(self.config["event_log_dir"]), writable=False)
+        page: List[dict] = []
+        for offset, event in event_log.read(from_offset):
+            if event.get('event') != self.event_type:
+                continue
+            if self.shard is not None and not self.shard.owns(offset):
+                continue
+            page.append(dict(event, Offset=offset))
+            if len(page) >= self.limit:
+                yield page
+                page = []
+        if page:
+            yield page
@@ -0,0 +1,161 @@
+"""Enrichment of message rows with cached dimension lookups."""
+
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from tap_mailjet.storage import dump_json, load_json
+
+DEFAULT_CACHE_SIZE = 100000
+LOOKUP_CONCURRENCY = 4
+# Attempts of a lookup failing with a transient error (HTTP 429 or 5xx)
+LOOKUP_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 1.0
+
+
+class LookupFailed(RuntimeError):
+    """Raised when a dimension lookup fails with anything but HTTP 404."""
+
+
+class LRUCache:
+    """Size-bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize: int, items: Optional[Iterable] = None) -> None:
+        """Initialize the cache, optionally from `(key, value)` pairs."""
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        for key, value in items or []:
+            self.put(key, value)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Any) -> Any:
+        """Return the cached value for `key` and mark it as recently used."""
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: Any, value: Any) -> None:
+        """Store `value` for `key`, evicting the oldest entry when full."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def items(self) -> List[list]:
+        """Return `[key, value]` pairs from least to most recently used."""
+        return [[key, value] for key, value in self._data.items()]
+
+
+class Dimension:
+    """A Mailjet resource used to resolve an ID column into one of its fields."""
+
+    def __init__(
+        self, id_field: str, target_field: str, resource: str, value_field: str
+    ) -> None:
+        """Resolve `id_field` to `resource.value_field`, stored in `target_field`."""
+        self.id_field = id_field
+        self.target_field = target_field
+        self.resource = resource
+        self.value_field = value_field
+
+
+MESSAGE_DIMENSIONS = [
+    Dimension("SenderID", "SenderEmail", "sender", "Email"),
+    Dimension("DestinationID", "DestinationDomain", "domainstatistics", "Domain"),
+    Dimension("CampaignID", "CampaignSubject", "campaign", "Subject"),
+]
+
+
+class Enricher:
+    """Resolve dimension IDs of whole pages with at most one lookup per new ID.
+
+    IDs are deduplicated per page and looked up concurrently only when missing
+    from the cache, so the number of requests grows with the number of distinct
+    senders, domains and campaigns rather than with the number of messages.
+    IDs unknown to the API (HTTP 404) are cached as None. Other failed lookups
+    are retried if transient and then raise, so they are never cached.
+    """
+
+    def __init__(
+        self,
+        conn: Any,
+        dimensions: List[Dimension],
+        cache_path: Path,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        request: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        """Initialize the enricher, loading caches persisted by previous runs.
+
+        `request(endpoint, **kwargs)` sends the lookups, by default `endpoint.get`.
+        """
+        self.conn = conn
+        self.request = request or (lambda endpoint, **kwargs: endpoint.get(**kwargs))
+        self.dimensions = dimensions
+        self.cache_path = cache_path
+        persisted = load_json(cache_path, {})
+        self.caches: Dict[str, LRUCache] = {
+            d.resource: LRUCache(cache_size, persisted.get(d.resource))
+            for d in dimensions
+        }
+        self.lookup_count = 0
+
+    def enrich(self, page: List[dict]) -> None:
+        """Add the resolved dimension fields to every row of `page` in place."""
+        for dimension in self.dimensions:
+            cache = self.caches[dimension.resource]
+            # Rows are filled from the page's own results, which the cache may
+            # already have evicted if the page holds more IDs than it fits
+            resolved: Dict[Any, Any] = {}
+            missing = set()
+            for row in page:
+                id_value = row.get(dimension.id_field)
+                if not id_value or id_value in resolved:
+                    continue
+                if id_value in cache:
+                    resolved[id_value] = cache.get(id_value)
+                else:
+                    missing.add(id_value)
+            if missing:
+                looked_up = self._lookup(dimension, sorted(missing))
+                for key, value in looked_up.items():
+                    cache.put(key, value)
+                resolved.update(looked_up)
+            for row in page:
+                row[dimension.target_field] = resolved.get(row.get(dimension.id_field))
+
+    def save(self) -> None:
+        """Persist the caches for the next run."""
+        dump_json(
+            self.cache_path,
+            {resource: cache.items() for resource, cache in self.caches.items()},
+        )
+
+    def _lookup(self, dimension: Dimension, ids: List[int]) -> Dict[int, Any]:
+        endpoint = getattr(self.conn, dimension.resource)
+
+        def fetch(key: int) -> Any:
+            for attempt in range(LOOKUP_ATTEMPTS):
+                if attempt:
+                    time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                res = self.request(endpoint, id=key)
+                if res.status_code == 200:
+                    data = res.json().get("Data") or [{}]
+                    return data[0].get(dimension.value_field)
+                if res.status_code == 404:
+                    return None
+                if res.status_code != 429 and res.status_code < 500:
+                    break
+            raise LookupFailed(
+                f"Could not look up {dimension.resource} {key}: "
+                f"HTTP {res.status_code}"
+            )
+
+        self.lookup_count += len(ids)
+        with ThreadPoolExecutor(max_workers=LOOKUP_CONCURRENCY) as executor:
+            return dict(zip(ids, executor.map(fetch, ids)))
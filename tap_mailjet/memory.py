@@ -0,0 +1,152 @@
+"""Bounded-memory execution with backpressure from the output to the fetchers.
+
+Every page is reserved against a global budget of buffered records before it is
+fetched, and only released once the stream moved on to its next page, i.e. once
+all of the page's records were written. Records are written to stdout
+synchronously, so a slow target blocks the writers, the budget is not released
+and fetchers of all streams wait instead of piling up pages in memory.
+"""
+
+import gc
+import logging
+import math
+import os
+import sys
+import threading
+from types import ModuleType
+from typing import Iterable, Iterator, List, Optional, TypeVar
+
+resource: Optional[ModuleType]
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+T = TypeVar("T")
+MB = 1024 * 1024
+# A new RSS high-water mark is logged once it exceeds the last one by this factor
+HIGH_WATER_LOG_STEP = 1.1
+
+
+def current_rss() -> Optional[int]:
+    """Return the resident set size of this process in bytes, if available.
+
+    Outside of Linux, the peak resident set size is returned instead.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class MemoryLimitExceeded(MemoryError):
+    """Raised when the memory ceiling is exceeded with no page left to wait for."""
+
+
+class MemoryGovernor:
+    """Global budget of buffered records and memory ceiling shared by all streams."""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        max_buffered_records: Optional[int] = None,
+        max_memory_mb: Optional[float] = None,
+    ) -> None:
+        """Initialize the governor.
+
+        Args:
+            logger: Logger for RSS high-water marks.
+            max_buffered_records: Maximum number of records in fetched pages that
+                were not written yet, across all streams. A single page larger
+                than the budget is still fetched once no other page is buffered.
+            max_memory_mb: Hard ceiling of the resident set size. Above it, no
+                page is fetched until all others were written, and the sync fails
+                if the ceiling is still exceeded then.
+        """
+        self.logger = logger
+        self.max_buffered_records = max_buffered_records or math.inf
+        self.max_memory = max_memory_mb * MB if max_memory_mb else None
+        self.buffered_records = 0
+        self.high_water_rss = 0
+        self._logged_rss = 0
+        self._condition = threading.Condition()
+
+    def bounded(self, pages: Iterable[T], page_size: int) -> Iterator[T]:
+        """Yield `pages`, fetching each one only within the budget.
+
+        A page of up to `page_size` records is reserved before it is fetched and
+        released when the next page is requested or the consumer stops.
+        """
+        iterator = iter(pages)
+        while True:
+            self.acquire(page_size)
+            try:
+                try:
+                    page = next(iterator)
+                except StopIteration:
+                    return
+                yield page
+            finally:
+                self.release(page_size)
+
+    def acquire(self, records: int) -> None:
+        """Block until `records` more records fit into the budget."""
+        with self._condition:
+            while self.buffered_records and (
+                self.buffered_records + records > self.max_buffered_records
+                or self._over_ceiling()
+            ):
+                self._condition.wait(timeout=1)
+            if self._over_ceiling():
+                gc.collect()
+                if self._over_ceiling() and self.max_memory is not None:
+                    raise MemoryLimitExceeded(
+                        f"RSS of {self.high_water_rss / MB:.0f} MB exceeds the "
+                        f"max_memory_mb ceiling of {self.max_memory / MB:.0f} MB."
+                    )
+            self.buffered_records += records
+
+    def release(self, records: int) -> None:
+        """Return `records` to the budget and wake up waiting fetchers."""
+        with self._condition:
+            self.buffered_records -= records
+            self._condition.notify_all()
+
+    def log_high_water(self) -> None:
+        """Log the highest RSS observed."""
+        with self._condition:
+            self.check_rss()
+        self.logger.info(f"RSS high-water mark: {self.high_water_rss / MB:.0f} MB.")
+
+    def check_rss(self) -> Optional[int]:
+        """Return the current RSS, tracking and logging new high-water marks."""
+        rss = current_rss()
+        if rss is None:
+            return None
+        if rss > self.high_water_rss:
+            self.high_water_rss = rss
+            if rss > self._logged_rss * HIGH_WATER_LOG_STEP:
+                self._logged_rss = rss
+                self.logger.info(f"New RSS high-water mark: {rss / MB:.0f} MB.")
+        return rss
+
+    def _over_ceiling(self) -> bool:
+        if self.max_memory is None:
+            self.check_rss()
+            return False
+        rss = self.check_rss()
+        return rss is not None and rss > self.max_memory
+
+
+def bounded_pages(
+    governor: Optional[MemoryGovernor], pages: Iterable[List[dict]], page_size: int
+) -> Iterable[List[dict]]:
+    """Return `pages`, bounded by `governor` if memory-bounded mode is enabled."""
+    if governor is None:
+        return pages
+    return governor.bounded(pages, page_size)
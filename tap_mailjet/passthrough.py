@@ -0,0 +1,87 @@
+"""Raw passthrough of API records into RECORD messages.
+
+API responses are decoded element by element, so every record of `Data` keeps
+the raw JSON text it was decoded from. When a record needs no conformance or
+transformation, that text is wrapped into the RECORD envelope as is, instead of
+being re-encoded from the decoded record.
+"""
+
+import datetime
+import json
+import re
+from json.decoder import scanstring  # type: ignore[attr-defined]
+from typing import Any, List, Tuple
+
+import singer
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class RawRecord(dict):
+    """A decoded API record keeping the raw JSON text it was decoded from."""
+
+    __slots__ = ("raw_json",)
+    raw_json: str
+
+
+def _skip(text: str, index: int) -> int:
+    match = _WHITESPACE.match(text, index)
+    return match.end() if match else index
+
+
+def _decode_records(text: str, index: int) -> Tuple[List[Any], int]:
+    """Decode the array starting at `index`, keeping the raw text of objects."""
+    records: List[Any] = []
+    index = _skip(text, index + 1)
+    if text[index] == "]":
+        return records, index + 1
+    while True:
+        value, end = _DECODER.raw_decode(text, index)
+        if isinstance(value, dict):
+            value = RawRecord(value)
+            value.raw_json = text[index:end]
+        records.append(value)
+        index = _skip(text, end)
+        if text[index] == "]":
+            return records, index + 1
+        index = _skip(text, index + 1)
+
+
+def decode_response(text: str) -> dict:
+    """Decode an API response, keeping the raw JSON text of every `Data` record."""
+    try:
+        data: dict = {}
+        index = _skip(text, 0)
+        if text[index] != "{":
+            return json.loads(text)
+        index = _skip(text, index + 1)
+        if text[index] == "}":
+            return data
+        while True:
+            key, index = scanstring(text, index + 1)
+            index = _skip(text, _skip(text, index) + 1)
+            if key == "Data" and text[index] == "[":
+                data[key], index = _decode_records(text, index)
+            else:
+                data[key], index = _DECODER.raw_decode(text, index)
+            index = _skip(text, index)
+            if text[index] == "}":
+                return data
+            index = _skip(text, index + 1)
+    except (IndexError, ValueError):
+        # Let the regular decoder report malformed responses
+        return json.loads(text)
+
+
+def format_record_message(
+    stream: str, raw_json: str, time_extracted: datetime.datetime
+) -> str:
+    """Return a RECORD message line wrapping a record's raw JSON text."""
+    if "\n" in raw_json or "\r" in raw_json:
+        # Only whitespace can contain line breaks, and messages are line-delimited
+        raw_json = raw_json.replace("\r", " ").replace("\n", " ")
+    return (
+        f'{{"type": "RECORD", "stream": {json.dumps(stream)}, "record": {raw_json}, '
+        f'"time_extracted": "{singer.utils.strftime(time_extracted)}"}}\n'
+    )
@@ -0,0 +1,112 @@
+"""Built-in profiling of sync runs.
+
+A deterministic cProfile profile is captured for every stream and for the run as
+a whole, and wall-clock time is split into phases (HTTP requests, JSON decoding,
+record conformance and writing to stdout). The resulting `.pstats` files can be
+inspected with `python -m pstats`, snakeviz, or converted to flamegraphs.
+"""
+
+import cProfile
+import json
+import logging
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+RUN_PROFILE_NAME = "run"
+
+
+class SyncProfiler:
+    """Collect cProfile profiles and phase timings, and write them as artifacts."""
+
+    def __init__(self, output_dir: Path, logger: logging.Logger) -> None:
+        """Initialize the profiler writing its artifacts into `output_dir`."""
+        self.output_dir = output_dir
+        self.logger = logger
+        self.phases: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self._lock = threading.Lock()
+        self._run_profile: Optional[cProfile.Profile] = None
+        self._run_thread: Optional[int] = None
+        self._stream_profiles: Dict[str, cProfile.Profile] = {}
+
+    @contextmanager
+    def profile_run(self) -> Iterator[None]:
+        """Profile the whole run and write all artifacts when it ends."""
+        self._run_profile = cProfile.Profile()
+        self._run_thread = threading.get_ident()
+        start = time.perf_counter()
+        self._run_profile.enable()
+        try:
+            yield
+        finally:
+            self._run_profile.disable()
+            self.phases[RUN_PROFILE_NAME]["total"] = time.perf_counter() - start
+            self.write_report()
+
+    @contextmanager
+    def profile_stream(self, stream_name: str) -> Iterator[None]:
+        """Profile a single stream's sync.
+
+        Only one profiler can be active per thread, so the run profile is paused
+        meanwhile and the stream's profile is merged into it in the report.
+        """
+        run_profile = (
+            self._run_profile if self._run_thread == threading.get_ident() else None
+        )
+        if run_profile is not None:
+            run_profile.disable()
+        profile = self._stream_profiles.setdefault(stream_name, cProfile.Profile())
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.add_time(stream_name, "total", time.perf_counter() - start)
+            if run_profile is not None:
+                run_profile.enable()
+
+    @contextmanager
+    def phase(self, stream_name: str, phase: str) -> Iterator[None]:
+        """Add the wall-clock time spent in the block to the stream's `phase`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stream_name, phase, time.perf_counter() - start)
+
+    def add_time(self, stream_name: str, phase: str, seconds: float) -> None:
+        """Add `seconds` to a stream's phase timing."""
+        with self._lock:
+            self.phases[stream_name][phase] += seconds
+
+    def write_report(self) -> None:
+        """Write pstats files per stream and for the run, and a phase summary."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        run_stats = None
+        if self._run_profile is not None:
+            run_stats = pstats.Stats(self._run_profile)
+        for stream_name, profile in self._stream_profiles.items():
+            profile.dump_stats(str(self.output_dir / f"stream-{stream_name}.pstats"))
+            if run_stats is None:
+                run_stats = pstats.Stats(profile)
+            else:
+                run_stats.add(profile)
+        if run_stats is not None:
+            run_stats.dump_stats(str(self.output_dir / f"{RUN_PROFILE_NAME}.pstats"))
+
+        summary = {
+            name: {phase: round(seconds, 6) for phase, seconds in phases.items()}
+            for name, phases in self.phases.items()
+        }
+        with open(self.output_dir / "phases.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+        for name, phases in sorted(summary.items()):
+            self.logger.info(f"Profile of '{name}': {phases}")
+        self.logger.info(f"Wrote profiling artifacts to '{self.output_dir}'.")
@@ -0,0 +1,182 @@
+"""Incremental per-campaign, per-day rollups of opens, clicks and bounces.
+
+Open, click and bounce rows are counted into `(CampaignID, Date)` buckets while
+their streams are synced. The partial aggregates are kept on disk between runs,
+so every run only adds the new events and emits the buckets that changed, with
+their updated totals.
+
+Click rows only reference their message. They are attributed to campaigns with
+the `MessageID -> CampaignID` map recorded from the message rows streaming
+through the tap, instead of looking up every message. Clicks of messages not
+synced yet are held back until their message is.
+"""
+
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from tap_mailjet.storage import dump_json, load_json
+from tap_mailjet.windows import normalize_ts
+
+ROLLUP_METRICS = ("Opens", "Clicks", "Bounces")
+# Bucket of events that are not linked to a campaign
+NO_CAMPAIGN_ID = 0
+
+
+def _bucket_key(campaign_id: Optional[int], date: str) -> str:
+    return f"{campaign_id or NO_CAMPAIGN_ID}|{date}"
+
+
+class RollupUpdate:
+    """Counts of one source stream sync, applied once the sync completes.
+
+    Rows up to the source's watermark, i.e. the latest timestamp counted by a
+    previous run and the IDs of the rows at exactly that timestamp, are skipped.
+    Re-reading the rows at the bookmark, or retrying a failed run, therefore
+    never counts an event twice.
+    """
+
+    def __init__(self, metric: str, watermark: Optional[dict]) -> None:
+        """Initialize an update of `metric` starting after `watermark`."""
+        watermark = watermark or {}
+        self.metric = metric
+        self.since: Optional[str] = watermark.get("since")
+        self.since_ids: Set[Any] = set(watermark.get("ids", []))
+        self.latest = self.since
+        self.latest_ids = set(self.since_ids)
+        self.counts: Dict[str, int] = defaultdict(int)
+        # Counts of events to attribute through their message, by `MessageID|Date`
+        self.message_counts: Dict[str, int] = defaultdict(int)
+
+    def add(
+        self,
+        row_id: Any,
+        timestamp: Any,
+        campaign_id: Optional[int],
+        message_id: Optional[int] = None,
+    ) -> None:
+        """Count an event, unless a previous run already counted it.
+
+        Events with a `message_id` are attributed to its campaign on commit.
+        """
+        ts = normalize_ts(timestamp)
+        if ts is None:
+            return
+        if self.since and (
+            ts < self.since or (ts == self.since and row_id in self.since_ids)
+        ):
+            return
+        if message_id:
+            self.message_counts[f"{message_id}|{ts[:10]}"] += 1
+        else:
+            self.counts[_bucket_key(campaign_id, ts[:10])] += 1
+        if self.latest is None or ts > self.latest:
+            self.latest, self.latest_ids = ts, {row_id}
+        elif ts == self.latest:
+            self.latest_ids.add(row_id)
+
+    @property
+    def watermark(self) -> dict:
+        """Return the watermark to start the next update of this metric from."""
+        return {"since": self.latest, "ids": sorted(self.latest_ids)}
+
+
+class RollupAggregator:
+    """On-disk counts per `(CampaignID, Date)` bucket, updated incrementally.
+
+    Buckets changed by completed source syncs are kept until the rollup stream
+    emitted them, so they are not lost if a run fails in between. Counts of
+    events whose message is not known yet are kept unattributed until it is.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Load the aggregates persisted by previous runs from `path`."""
+        self.path = path
+        data = load_json(path, {})
+        self.buckets: Dict[str, Dict[str, int]] = data.get("buckets", {})
+        self.watermarks: Dict[str, dict] = data.get("watermarks", {})
+        self.changed: Set[str] = set(data.get("changed", []))
+        self.message_campaigns: Dict[str, int] = data.get("message_campaigns", {})
+        self.unattributed: Dict[str, Dict[str, int]] = data.get("unattributed", {})
+        self._lock = threading.Lock()
+
+    def start(self, metric: str) -> RollupUpdate:
+        """Return an update counting new events of `metric`."""
+        with self._lock:
+            return RollupUpdate(metric, self.watermarks.get(metric))
+
+    def commit(self, update: RollupUpdate) -> None:
+        """Apply the counts of a completed source sync and persist them."""
+        if not update.counts and not update.message_counts:
+            return
+        with self._lock:
+            for key, count in update.counts.items():
+                self._add(key, update.metric, count)
+            unattributed = self.unattributed.setdefault(update.metric, {})
+            for key, count in update.message_counts.items():
+                unattributed[key] = unattributed.get(key, 0) + count
+            self._attribute()
+            self.watermarks[update.metric] = update.watermark
+            self._save()
+
+    def add_messages(self, rows: List[dict]) -> None:
+        """Record the campaign of every message row, to attribute their events."""
+        with self._lock:
+            for row in rows:
+                if row.get("ID"):
+                    self.message_campaigns[str(row["ID"])] = (
+                        row.get("CampaignID") or NO_CAMPAIGN_ID
+                    )
+
+    def commit_messages(self) -> None:
+        """Attribute held back events to the recorded messages and persist them."""
+        with self._lock:
+            self._attribute()
+            self._save()
+
+    def changed_rows(self) -> List[dict]:
+        """Return the current totals of all changed buckets."""
+        with self._lock:
+            rows = []
+            for key in sorted(self.changed):
+                campaign_id, date = key.split("|")
+                row = {"CampaignID": int(campaign_id), "Date": date}
+                for metric in ROLLUP_METRICS:
+                    row[metric] = self.buckets[key].get(metric, 0)
+                rows.append(row)
+            return rows
+
+    def mark_emitted(self, rows: List[dict]) -> None:
+        """Forget the changed buckets of `rows` once they were emitted."""
+        with self._lock:
+            emitted = {_bucket_key(row["CampaignID"], row["Date"]) for row in rows}
+            if self.changed & emitted:
+                self.changed -= emitted
+                self._save()
+
+    def _add(self, key: str, metric: str, count: int) -> None:
+        bucket = self.buckets.setdefault(key, {})
+        bucket[metric] = bucket.get(metric, 0) + count
+        self.changed.add(key)
+
+    def _attribute(self) -> None:
+        """Move unattributed counts of known messages into their campaign bucket."""
+        for metric, counts in self.unattributed.items():
+            for key in list(counts):
+                message_id, date = key.split("|")
+                campaign_id = self.message_campaigns.get(message_id)
+                if campaign_id is not None:
+                    self._add(_bucket_key(campaign_id, date), metric, counts.pop(key))
+
+    def _save(self) -> None:
+        dump_json(
+            self.path,
+            {
+                "buckets": self.buckets,
+                "watermarks": self.watermarks,
+                "changed": sorted(self.changed),
+                "message_campaigns": self.message_campaigns,
+                "unattributed": self.unattributed,
+            },
+        )
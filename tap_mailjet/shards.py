@@ -0,0 +1,177 @@
+"""Deterministic sharding of streams across several tap processes.
+
+With `shard_count` processes, each started with its own `shard_index`, every
+stream is restricted to a disjoint slice: streams filtered by `FromTS` are split
+into equal, contiguous time slices between `start_date` and `end_date`, and all
+other streams are striped by API page over a stable `ID` ordering. Each process
+keeps its own state, and the shard states are merged back into one canonical
+state with::
+
+    tap-mailjet-merge-state shard-0.json shard-1.json > state.json
+"""
+
+import argparse
+import datetime
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from tap_mailjet.scheduler import SYNC_STATS_KEY
+from tap_mailjet.windows import format_ts, parse_ts
+
+SHARD_STATE_KEY = "shard"
+
+
+class Shard:
+    """Slice `index` of `count` disjoint slices of every stream."""
+
+    def __init__(
+        self,
+        index: int,
+        count: int,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> None:
+        """Initialize the shard, validating its index."""
+        if not 0 <= index < count:
+            raise ValueError(
+                f"shard_index must be between 0 and {count - 1}, got {index}."
+            )
+        self.index = index
+        self.count = count
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["Shard"]:
+        """Return the shard configured for this process, if sharding is enabled."""
+        count = config.get("shard_count") or 1
+        if count <= 1:
+            return None
+        return cls(
+            config.get("shard_index", 0),
+            count,
+            config.get("start_date"),
+            config.get("end_date"),
+        )
+
+    def owns(self, number: int) -> bool:
+        """Return whether the page or offset `number` belongs to this shard."""
+        return number % self.count == self.index
+
+    def time_slice(self) -> Tuple[datetime.datetime, datetime.datetime]:
+        """Return this shard's `[from, until)` slice of `[start_date, end_date)`.
+
+        Both dates must be fixed, so that all shards compute the same slices.
+        """
+        if not self.start_date or not self.end_date:
+            raise ValueError(
+                "Sharding streams filtered by FromTS requires start_date and end_date."
+            )
+        start, end = parse_ts(self.start_date), parse_ts(self.end_date)
+        width = (end - start) / self.count
+        until = (
+            end if self.index == self.count - 1 else start + width * (self.index + 1)
+        )
+        return start + width * self.index, until
+
+    def state(self, time_sliced: bool, completed: bool) -> dict:
+        """Return the shard description kept in a stream's state."""
+        shard_state: Dict[str, Any] = {
+            "index": self.index,
+            "count": self.count,
+            "completed": completed,
+        }
+        if time_sliced:
+            slice_start, slice_end = self.time_slice()
+            shard_state.update(
+                {"from": format_ts(slice_start), "until": format_ts(slice_end)}
+            )
+        return shard_state
+
+
+def _merge_stream_states(stream_name: str, stream_states: List[dict]) -> dict:
+    """Merge the states of one stream, written by all of its shards."""
+    shards = {
+        state[SHARD_STATE_KEY]["index"]: state
+        for state in stream_states
+        if SHARD_STATE_KEY in state
+    }
+    if not shards:
+        return stream_states[0]
+    count = next(iter(shards.values()))[SHARD_STATE_KEY]["count"]
+    missing = sorted(set(range(count)) - set(shards))
+    if missing:
+        raise ValueError(
+            f"Stream '{stream_name}' is missing the states of shards {missing}."
+        )
+
+    ordered = [shards[index] for index in range(count)]
+    replication_key = next(
+        (state["replication_key"] for state in ordered if "replication_key" in state),
+        None,
+    )
+    merged: dict = {}
+    if "from" in ordered[0][SHARD_STATE_KEY]:
+        # Time slices are contiguous: the canonical bookmark is the end of the
+        # completed prefix of slices, or the progress within the first gap.
+        bookmark = None
+        for state in ordered:
+            shard_state = state[SHARD_STATE_KEY]
+            if shard_state["completed"]:
+                bookmark = shard_state["until"]
+                continue
+            value = state.get("replication_key_value")
+            if value and parse_ts(value) >= parse_ts(shard_state["from"]):
+                bookmark = value
+            else:
+                bookmark = shard_state["from"]
+            break
+        if replication_key:
+            merged.update(
+                replication_key=replication_key, replication_key_value=bookmark
+            )
+    else:
+        # Striped shards: resuming from the smallest bookmark never skips rows
+        values = [state.get("replication_key_value") for state in ordered]
+        bookmarks = [value for value in values if value is not None]
+        if replication_key and len(bookmarks) == len(values):
+            merged.update(
+                replication_key=replication_key, replication_key_value=min(bookmarks)
+            )
+
+    stats = [state[SYNC_STATS_KEY] for state in ordered if SYNC_STATS_KEY in state]
+    if stats:
+        merged[SYNC_STATS_KEY] = {
+            "duration_seconds": max(s["duration_seconds"] for s in stats),
+            "record_count": sum(s["record_count"] for s in stats),
+        }
+    return merged
+
+
+def merge_states(states: List[dict]) -> dict:
+    """Merge the tap states written by all shards into one canonical state."""
+    stream_states: Dict[str, List[dict]] = {}
+    for state in states:
+        for stream_name, stream_state in state.get("bookmarks", {}).items():
+            stream_states.setdefault(stream_name, []).append(stream_state)
+    return {
+        "bookmarks": {
+            stream_name: _merge_stream_states(stream_name, shard_states)
+            for stream_name, shard_states in sorted(stream_states.items())
+        }
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Merge shard state files and write the canonical state to stdout."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("states", nargs="+", help="State files written by the shards.")
+    args = parser.parse_args(argv)
+
+    states = []
+    for path in args.states:
+        with open(path, "r", encoding="utf-8") as f:
+            states.append(json.load(f))
+    json.dump(merge_states(states), sys.stdout, indent=2)
+    sys.stdout.write("\n")
@@ -0,0 +1,37 @@
+"""Local files kept between runs, such as caches and indexes."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+DEFAULT_LOCAL_STATE_DIR = ".tap-mailjet"
+
+
+def local_state_path(config: dict, *parts: str) -> Path:
+    """Return a path below the configured `local_state_dir`.
+
+    Shards keep separate files, as they see different subsets of the data.
+    """
+    root = Path(config.get("local_state_dir") or DEFAULT_LOCAL_STATE_DIR)
+    shard_count = config.get("shard_count") or 1
+    if shard_count > 1:
+        root = root / f"shard-{config.get('shard_index', 0)}-of-{shard_count}"
+    return Path(root, *parts)
+
+
+def load_json(path: Path, default: Any) -> Any:
+    """Return the JSON content of `path`, or `default` if it does not exist."""
+    if not path.exists():
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dump_json(path: Path, data: Any) -> None:
+    """Atomically replace `path` with `data` encoded as JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
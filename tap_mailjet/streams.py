@@ -5,7 +5,14 @@ from typing import Any, Dict, Optional, Union, List, Iterable
 
 from singer_sdk import typing as th  # JSON Schema typing helpers
 
-from tap_mailjet.client import mailjetStream
+from tap_mailjet.client import (
+    ContentStream, DescendingScanStream, EventLogStream, EventSource, MergedEventStream,
+    RollupSourceStream, RollupStream, mailjetStream,
+)
+from tap_mailjet.enrichment import (
+    DEFAULT_CACHE_SIZE, MESSAGE_DIMENSIONS, Enricher,
+)
+from tap_mailjet.storage import local_state_path
 
 class MessageStream(mailjetStream):
     """Define custom stream."""
@@ -164,8 +171,66 @@ class MessageStream(mailjetStream):
             th.StringType,
             description="Unique 128-bit ID for this message."
         ),
+        th.Property(
+            "SenderEmail",
+            th.StringType,
+            description="Email address of the sender. Only populated when enrich_messages=true."
+        ),
+        th.Property(
+            "DestinationDomain",
+            th.StringType,
+            description="Recipient email domain. Only populated when enrich_messages=true."
+        ),
+        th.Property(
+            "CampaignSubject",
+            th.StringType,
+            description="Subject of the campaign this message is part of. Only populated when enrich_messages=true."
+        ),
     ).to_dict()
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enricher = None
+        # Enrichment adds fields to the API records
+        self.supports_passthrough = not self.config.get("enrich_messages")
+        if self.config.get("enrich_messages"):
+            # The contact email is returned inline as ContactAlt, without lookups
+            self.request_params = dict(self.request_params, ShowContactAlt=True)
+            self.enricher = Enricher(
+                self.conn,
+                MESSAGE_DIMENSIONS,
+                local_state_path(self.config, "enrichment_cache.json"),
+                cache_size=self.config.get("enrichment_cache_size", DEFAULT_CACHE_SIZE),
+                request=self.request,
+            )
+
+    def get_pages(self, context: Optional[dict]) -> Iterable[List[dict]]:
+        """Return pages of messages, enriched with sender, domain and campaign.
+
+        With rollups enabled, the campaign of every message is recorded, to
+        attribute the message's clicks.
+        """
+        rollups = getattr(self._tap, "rollups", None)
+        if self.config.get("sample_size"):
+            rollups = None
+        for page in super().get_pages(context):
+            if self.enricher:
+                with self.profile_phase("enrichment"):
+                    self.enricher.enrich(page)
+            if rollups is not None:
+                with self.profile_phase("rollup"):
+                    rollups.add_messages(page)
+            yield page
+        if rollups is not None:
+            rollups.commit_messages()
+        if not self.enricher:
+            return
+        self.logger.info(
+            f"Enriched messages with {self.enricher.lookup_count} dimension lookups."
+        )
+        if not self.config.get("sample_size"):
+            self.enricher.save()
+
 
 class ContactStream(mailjetStream):
     """Define custom stream."""
@@ -286,13 +351,14 @@ class ContactsListStream(mailjetStream):
     ).to_dict()
 
 
-class CampaignDraftStream(mailjetStream):
+class CampaignDraftStream(DescendingScanStream):
     """Define custom stream."""
     primary_keys = ["ID"]
     name = "campaigndraft"
     # There is no way of filtering by updated timestamp so we always extract everything
-    # in case records changed
+    # in case records changed, unless `client_side_incremental` is enabled
     replication_key = None
+    modified_field = "ModifiedAt"
     schema = th.PropertiesList(
         th.Property(
             "ID",
@@ -582,13 +648,14 @@ class ContactFilterStream(mailjetStream):
     ).to_dict()
 
 
-class TemplateStream(mailjetStream):
+class TemplateStream(DescendingScanStream):
     """Define custom stream."""
     primary_keys = ["ID"]
     name = "template"
     # There is no way of filtering by updated timestamp so we always extract everything
-    # in case records changed
+    # in case records changed, unless `client_side_incremental` is enabled
     replication_key = None
+    modified_field = "LastUpdatedAt"
     schema = th.PropertiesList(
         th.Property(
             "ID",
@@ -695,12 +762,13 @@ class TemplateStream(mailjetStream):
     ).to_dict()
 
 
-class BounceStatisticsStream(mailjetStream):
+class BounceStatisticsStream(RollupSourceStream):
     """Define custom stream."""
     primary_keys = ["ID"]
     name = "bouncestatistics"
     replication_key = "BouncedAt"
     replication_request_param = "FromTS"
+    rollup_metric = "Bounces"
     schema = th.PropertiesList(
         th.Property(
             "ID",
@@ -765,12 +833,15 @@ class BounceStatisticsStream(mailjetStream):
     ).to_dict()
 
 
-class ClickStatisticsStream(mailjetStream):
+class ClickStatisticsStream(RollupSourceStream):
     """Define custom stream."""
     primary_keys = ["ID"]
     name = "clickstatistics"
     replication_key = "ClickedAt"
     replication_request_param = "FromTS"
+    rollup_metric = "Clicks"
+    # Click rows only reference the message, whose campaign the rollups record
+    rollup_message_field = "MessageID"
     schema = th.PropertiesList(
         th.Property(
             "ID",
@@ -811,12 +882,13 @@ class ClickStatisticsStream(mailjetStream):
     ).to_dict()
 
 
-class OpenInformationStream(mailjetStream):
+class OpenInformationStream(RollupSourceStream):
     """Define custom stream."""
     primary_keys = ["ID"]
     name = "openinformation"
     replication_key = "OpenedAt"
     replication_request_param = "FromTS"
+    rollup_metric = "Opens"
     schema = th.PropertiesList(
         th.Property(
             "ID",
@@ -860,3 +932,446 @@ class OpenInformationStream(mailjetStream):
             description="Unique numeric ID for the user agent (browser) used for this click event."
         ),
     ).to_dict()
+
+
+class EmailEventStream(MergedEventStream):
+    """Define custom stream."""
+    primary_keys = ["EventType", "ID"]
+    name = "email_events"
+    sources = [
+        EventSource("openinformation", "OpenedAt", "open"),
+        EventSource("clickstatistics", "ClickedAt", "click"),
+        EventSource("bouncestatistics", "BouncedAt", "bounce"),
+    ]
+    schema = th.PropertiesList(
+        th.Property(
+            "EventType",
+            th.StringType,
+            description="Type of the event: open, click or bounce.",
+            required=True
+        ),
+        th.Property(
+            "ID",
+            th.IntegerType,
+            description="Unique numeric ID of the event within its type.",
+            required=True
+        ),
+        th.Property(
+            "EventAt",
+            th.DateTimeType,
+            description="Timestamp indicating when the event occurred."
+        ),
+        th.Property(
+            "MessageID",
+            th.IntegerType,
+            description="Unique numeric ID of the message this event is linked to."
+        ),
+        th.Property(
+            "CampaignID",
+            th.IntegerType,
+            description="Unique numeric ID of the campaign this event is linked to. Not set for clicks."
+        ),
+        th.Property(
+            "ContactID",
+            th.IntegerType,
+            description="Unique numeric ID of the contact this event is linked to."
+        ),
+        th.Property(
+            "Url",
+            th.StringType,
+            description="The URL that generated this click event."
+        ),
+        th.Property(
+            "IsBlocked",
+            th.BooleanType,
+            description="Indicates whether the contact was blocked as a result of this bounce or not."
+        ),
+        th.Property(
+            "IsStatePermanent",
+            th.BooleanType,
+            description="Indicates whether this is a permanent (hard) bounce or not."
+        ),
+        th.Property(
+            "StateID",
+            th.IntegerType,
+            description="State of the message after the bounce event, see bouncestatistics."
+        ),
+    ).to_dict()
+
+
+class TemplateContentStream(ContentStream):
+    """Define custom stream."""
+    primary_keys = ["ID"]
+    name = "templatecontent"
+    resource = "template"
+    modified_field = "LastUpdatedAt"
+    # Content is only refetched for templates updated since the last run,
+    # tracked in a local index rather than in the stream state
+    replication_key = None
+    schema = th.PropertiesList(
+        th.Property(
+            "ID",
+            th.IntegerType,
+            description="Unique numeric ID of the template.",
+            required=True
+        ),
+        th.Property(
+            "LastUpdatedAt",
+            th.DateTimeType,
+            description="Timestamp indicating when the template was last updated."
+        ),
+        th.Property(
+            "Headers",
+            th.CustomType({"type": "object"}),
+            description="Email headers of the template, e.g. Subject, From and Reply-To."
+        ),
+        th.Property(
+            "Html-part",
+            th.StringType,
+            description="HTML content of the template."
+        ),
+        th.Property(
+            "Text-part",
+            th.StringType,
+            description="Plain text content of the template."
+        ),
+        th.Property(
+            "MJMLContent",
+            th.StringType,
+            description="JSON-encoded MJML content of templates created with the drag and drop editor."
+        ),
+    ).to_dict()
+
+
+class CampaignDraftContentStream(ContentStream):
+    """Define custom stream."""
+    primary_keys = ["ID"]
+    name = "campaigndraftcontent"
+    resource = "campaigndraft"
+    modified_field = "ModifiedAt"
+    # Content is only refetched for drafts modified since the last run,
+    # tracked in a local index rather than in the stream state
+    replication_key = None
+    schema = th.PropertiesList(
+        th.Property(
+            "ID",
+            th.IntegerType,
+            description="Unique numeric ID of the campaign draft.",
+            required=True
+        ),
+        th.Property(
+            "ModifiedAt",
+            th.DateTimeType,
+            description="Timestamp indicating when the campaign draft was last modified."
+        ),
+        th.Property(
+            "Headers",
+            th.CustomType({"type": "object"}),
+            description="Email headers of the campaign draft, e.g. Subject, From and Reply-To."
+        ),
+        th.Property(
+            "Html-part",
+            th.StringType,
+            description="HTML content of the campaign draft."
+        ),
+        th.Property(
+            "Text-part",
+            th.StringType,
+            description="Plain text content of the campaign draft."
+        ),
+        th.Property(
+            "MJMLContent",
+            th.StringType,
+            description="JSON-encoded MJML content of drafts created with the drag and drop editor."
+        ),
+    ).to_dict()
+
+
+class OpenEventStream(EventLogStream):
+    """Define custom stream."""
+    primary_keys = ["Offset"]
+    name = "openevent"
+    event_type = "open"
+    schema = th.PropertiesList(
+        th.Property(
+            "Offset",
+            th.IntegerType,
+            description="Offset of the event in the local event log.",
+            required=True
+        ),
+        th.Property(
+            "event",
+            th.StringType,
+            description="Event type."
+        ),
+        th.Property(
+            "time",
+            th.IntegerType,
+            description="Unix timestamp of the event."
+        ),
+        th.Property(
+            "MessageID",
+            th.IntegerType,
+            description="Unique numeric ID of the message."
+        ),
+        th.Property(
+            "Message_GUID",
+            th.StringType,
+            description="Unique 128-bit ID of the message."
+        ),
+        th.Property(
+            "email",
+            th.StringType,
+            description="Email address of the recipient."
+        ),
+        th.Property(
+            "mj_campaign_id",
+            th.IntegerType,
+            description="Unique numeric ID of the campaign."
+        ),
+        th.Property(
+            "mj_contact_id",
+            th.IntegerType,
+            description="Unique numeric ID of the contact."
+        ),
+        th.Property(
+            "customcampaign",
+            th.StringType,
+            description="Custom campaign name."
+        ),
+        th.Property(
+            "CustomID",
+            th.StringType,
+            description="Custom ID of the message, if set when sending."
+        ),
+        th.Property(
+            "Payload",
+            th.StringType,
+            description="Event payload of the message, if set when sending."
+        ),
+        th.Property(
+            "ip",
+            th.StringType,
+            description="IP address of the recipient."
+        ),
+        th.Property(
+            "geo",
+            th.StringType,
+            description="Country code of the recipient's IP address."
+        ),
+        th.Property(
+            "agent",
+            th.StringType,
+            description="User agent of the recipient."
+        ),
+    ).to_dict()
+
+
+class ClickEventStream(EventLogStream):
+    """Define custom stream."""
+    primary_keys = ["Offset"]
+    name = "clickevent"
+    event_type = "click"
+    schema = th.PropertiesList(
+        th.Property(
+            "Offset",
+            th.IntegerType,
+            description="Offset of the event in the local event log.",
+            required=True
+        ),
+        th.Property(
+            "event",
+            th.StringType,
+            description="Event type."
+        ),
+        th.Property(
+            "time",
+            th.IntegerType,
+            description="Unix timestamp of the event."
+        ),
+        th.Property(
+            "MessageID",
+            th.IntegerType,
+            description="Unique numeric ID of the message."
+        ),
+        th.Property(
+            "Message_GUID",
+            th.StringType,
+            description="Unique 128-bit ID of the message."
+        ),
+        th.Property(
+            "email",
+            th.StringType,
+            description="Email address of the recipient."
+        ),
+        th.Property(
+            "mj_campaign_id",
+            th.IntegerType,
+            description="Unique numeric ID of the campaign."
+        ),
+        th.Property(
+            "mj_contact_id",
+            th.IntegerType,
+            description="Unique numeric ID of the contact."
+        ),
+        th.Property(
+            "customcampaign",
+            th.StringType,
+            description="Custom campaign name."
+        ),
+        th.Property(
+            "CustomID",
+            th.StringType,
+            description="Custom ID of the message, if set when sending."
+        ),
+        th.Property(
+            "Payload",
+            th.StringType,
+            description="Event payload of the message, if set when sending."
+        ),
+        th.Property(
+            "url",
+            th.StringType,
+            description="URL of the clicked link."
+        ),
+        th.Property(
+            "ip",
+            th.StringType,
+            description="IP address of the recipient."
+        ),
+        th.Property(
+            "geo",
+            th.StringType,
+            description="Country code of the recipient's IP address."
+        ),
+        th.Property(
+            "agent",
+            th.StringType,
+            description="User agent of the recipient."
+        ),
+    ).to_dict()
+
+
+class BounceEventStream(EventLogStream):
+    """Define custom stream."""
+    primary_keys = ["Offset"]
+    name = "bounceevent"
+    event_type = "bounce"
+    schema = th.PropertiesList(
+        th.Property(
+            "Offset",
+            th.IntegerType,
+            description="Offset of the event in the local event log.",
+            required=True
+        ),
+        th.Property(
+            "event",
+            th.StringType,
+            description="Event type."
+        ),
+        th.Property(
+            "time",
+            th.IntegerType,
+            description="Unix timestamp of the event."
+        ),
+        th.Property(
+            "MessageID",
+            th.IntegerType,
+            description="Unique numeric ID of the message."
+        ),
+        th.Property(
+            "Message_GUID",
+            th.StringType,
+            description="Unique 128-bit ID of the message."
+        ),
+        th.Property(
+            "email",
+            th.StringType,
+            description="Email address of the recipient."
+        ),
+        th.Property(
+            "mj_campaign_id",
+            th.IntegerType,
+            description="Unique numeric ID of the campaign."
+        ),
+        th.Property(
+            "mj_contact_id",
+            th.IntegerType,
+            description="Unique numeric ID of the contact."
+        ),
+        th.Property(
+            "customcampaign",
+            th.StringType,
+            description="Custom campaign name."
+        ),
+        th.Property(
+            "CustomID",
+            th.StringType,
+            description="Custom ID of the message, if set when sending."
+        ),
+        th.Property(
+            "Payload",
+            th.StringType,
+            description="Event payload of the message, if set when sending."
+        ),
+        th.Property(
+            "blocked",
+            th.BooleanType,
+            description="Indicates whether the recipient was blocked before sending."
+        ),
+        th.Property(
+            "hard_bounce",
+            th.BooleanType,
+            description="Indicates whether the bounce is permanent or not."
+        ),
+        th.Property(
+            "error_related_to",
+            th.StringType,
+            description="Category of the bounce error, e.g. recipient or domain."
+        ),
+        th.Property(
+            "error",
+            th.StringType,
+            description="Bounce error."
+        ),
+        th.Property(
+            "comment",
+            th.StringType,
+            description="Details provided by the recipient's mail server."
+        ),
+    ).to_dict()
+
+
+class DailyCampaignEngagementStream(RollupStream):
+    """Define custom stream."""
+    primary_keys = ["CampaignID", "Date"]
+    name = "dailycampaignengagement"
+    schema = th.PropertiesList(
+        th.Property(
+            "CampaignID",
+            th.IntegerType,
+            description="Unique numeric ID of the campaign, 0 for events not linked to a campaign.",
+            required=True
+        ),
+        th.Property(
+            "Date",
+            th.DateType,
+            description="UTC day of the events.",
+            required=True
+        ),
+        th.Property(
+            "Opens",
+            th.IntegerType,
+            description="Number of open events synced from openinformation."
+        ),
+        th.Property(
+            "Clicks",
+            th.IntegerType,
+            description="Number of click events synced from clickstatistics."
+        ),
+        th.Property(
+            "Bounces",
+            th.IntegerType,
+            description="Number of bounce events synced from bouncestatistics."
+        ),
+    ).to_dict()
@@ -1,6 +1,7 @@
 """mailjet tap class."""
 
-from typing import List
+from pathlib import Path
+from typing import List, Type
 
 from singer_sdk import Tap, Stream
 from singer_sdk import typing as th  # JSON schema typing helpers
@@ -8,9 +9,17 @@ from tap_mailjet.streams import (
     MessageStream,
     ContactStream, ClickStatisticsStream, OpenInformationStream, BounceStatisticsStream,
     TemplateStream, ContactFilterStream, CampaignStream, ContactsListStream,
-    CampaignDraftStream,
+    CampaignDraftStream, TemplateContentStream, CampaignDraftContentStream,
+    OpenEventStream, ClickEventStream, BounceEventStream, DailyCampaignEngagementStream,
+    EmailEventStream,
 )
-STREAM_TYPES = [
+from tap_mailjet.client import OUTPUT_LOCK
+from tap_mailjet.memory import MemoryGovernor
+from tap_mailjet.profiling import SyncProfiler
+from tap_mailjet.rollups import RollupAggregator
+from tap_mailjet.scheduler import RateLimiter, StreamScheduler
+from tap_mailjet.storage import local_state_path
+STREAM_TYPES: List[Type[Stream]] = [
     ContactStream,
     MessageStream,
     ContactsListStream,
@@ -22,6 +31,25 @@ STREAM_TYPES = [
     ClickStatisticsStream,
     OpenInformationStream,
 ]
+# Streams fetching one detail resource per record, if `content_streams` is set
+CONTENT_STREAM_TYPES: List[Type[Stream]] = [
+    TemplateContentStream,
+    CampaignDraftContentStream,
+]
+# Streams merging other streams' resources, if `email_events` is set
+MERGED_STREAM_TYPES: List[Type[Stream]] = [
+    EmailEventStream,
+]
+# Streams reading webhooks stored by tap-mailjet-receiver, if `event_log_dir` is set
+EVENT_LOG_STREAM_TYPES: List[Type[Stream]] = [
+    OpenEventStream,
+    ClickEventStream,
+    BounceEventStream,
+]
+# Streams aggregating other streams, if `rollups` is set. Synced after all others.
+ROLLUP_STREAM_TYPES: List[Type[Stream]] = [
+    DailyCampaignEngagementStream,
+]
 
 
 class Tapmailjet(Tap):
@@ -45,8 +73,262 @@ class Tapmailjet(Tap):
             th.DateTimeType,
             description="The earliest record date to sync"
         ),
+        th.Property(
+            "end_date",
+            th.DateTimeType,
+            description="End of the period split into time slices when sharding"
+        ),
+        th.Property(
+            "shard_count",
+            th.IntegerType,
+            description="Number of tap processes sharing the sync, each restricted "
+                        "to a disjoint slice of every stream"
+        ),
+        th.Property(
+            "shard_index",
+            th.IntegerType,
+            description="Slice of every stream synced by this process, from 0 to "
+                        "shard_count - 1"
+        ),
+        th.Property(
+            "raw_passthrough",
+            th.BooleanType,
+            description="Write API records into RECORD messages as returned, "
+                        "without conforming and re-encoding them, where no "
+                        "transformation applies"
+        ),
+        th.Property(
+            "sample_size",
+            th.IntegerType,
+            description="Only sync a sample of this many records per stream, from "
+                        "spread-out offsets or time windows, without writing state"
+        ),
+        th.Property(
+            "max_parallel_streams",
+            th.IntegerType,
+            description="Sync up to this many streams concurrently, longest first "
+                        "according to previous runs (default: 1)"
+        ),
+        th.Property(
+            "max_requests_per_second",
+            th.NumberType,
+            description="Global API request rate budget shared by all streams"
+        ),
+        th.Property(
+            "max_buffered_records",
+            th.IntegerType,
+            description="Maximum number of fetched but not yet written records across "
+                        "all streams. Fetching waits while the target reads slowly"
+        ),
+        th.Property(
+            "max_memory_mb",
+            th.NumberType,
+            description="Hard ceiling of the tap's resident memory. Fetching waits "
+                        "above it, and the sync fails if it cannot get below"
+        ),
+        th.Property(
+            "profile_dir",
+            th.StringType,
+            description="Write cProfile pstats files and a phase timing summary for "
+                        "the run and each stream into this directory"
+        ),
+        th.Property(
+            "batch_config",
+            th.ObjectType(
+                th.Property(
+                    "encoding",
+                    th.ObjectType(
+                        th.Property(
+                            "format",
+                            th.StringType,
+                            description="Batch file format: 'jsonl' (default) or "
+                                        "'parquet'"
+                        ),
+                        th.Property(
+                            "compression",
+                            th.StringType,
+                            description="Batch file compression: 'gzip' (default) "
+                                        "or 'none', for Parquet also 'snappy' or "
+                                        "'zstd'"
+                        ),
+                    ),
+                ),
+                th.Property(
+                    "storage",
+                    th.ObjectType(
+                        th.Property(
+                            "root",
+                            th.StringType,
+                            description="Local directory or file:// URI for batch "
+                                        "files (default: output)"
+                        ),
+                        th.Property(
+                            "prefix",
+                            th.StringType,
+                            description="Prefix for batch file names"
+                        ),
+                    ),
+                ),
+                th.Property(
+                    "batch_size_rows",
+                    th.IntegerType,
+                    description="Rotate batch files after this many records"
+                ),
+                th.Property(
+                    "batch_size_bytes",
+                    th.IntegerType,
+                    description="Rotate batch files after this many uncompressed bytes"
+                ),
+            ),
+            description="Write records to local batch files and emit BATCH messages "
+                        "instead of one RECORD message per record"
+        ),
+        th.Property(
+            "local_state_dir",
+            th.StringType,
+            description="Directory for local caches and indexes kept between runs "
+                        "(default: .tap-mailjet)"
+        ),
+        th.Property(
+            "content_streams",
+            th.BooleanType,
+            description="Enable the templatecontent and campaigndraftcontent streams"
+        ),
+        th.Property(
+            "content_fetch_concurrency",
+            th.IntegerType,
+            description="Number of template and campaign draft contents fetched in "
+                        "parallel (default: 4)"
+        ),
+        th.Property(
+            "email_events",
+            th.BooleanType,
+            description="Enable the email_events stream merging opens, clicks and "
+                        "bounces in time order"
+        ),
+        th.Property(
+            "event_log_dir",
+            th.StringType,
+            description="Event log directory of tap-mailjet-receiver. Enables the "
+                        "openevent, clickevent and bounceevent streams"
+        ),
+        th.Property(
+            "client_side_incremental",
+            th.BooleanType,
+            description="Sync templates and campaign drafts incrementally by scanning "
+                        "them newest first and stopping behind the bookmark"
+        ),
+        th.Property(
+            "rollups",
+            th.BooleanType,
+            description="Maintain per-campaign, per-day counts of opens, clicks and "
+                        "bounces in the dailycampaignengagement stream"
+        ),
+        th.Property(
+            "enrich_messages",
+            th.BooleanType,
+            description="Add sender email, contact email (ContactAlt), destination "
+                        "domain and campaign subject to message rows"
+        ),
+        th.Property(
+            "enrichment_cache_size",
+            th.IntegerType,
+            description="Maximum number of cached lookups per dimension "
+                        "(default: 100000)"
+        ),
+        th.Property(
+            "window_target_rows",
+            th.IntegerType,
+            description="Plan density-aware FromTS/ToTS windows of at most this many "
+                        "rows for time-filtered streams, skipping empty history"
+        ),
+        th.Property(
+            "window_min_seconds",
+            th.IntegerType,
+            description="Smallest window width the planner splits to (default: 3600)"
+        ),
     ).to_dict()
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profiler = None
+        if self.config.get("profile_dir"):
+            self.profiler = SyncProfiler(Path(self.config["profile_dir"]), self.logger)
+        self.rate_limiter = None
+        if self.config.get("max_requests_per_second"):
+            self.rate_limiter = RateLimiter(self.config["max_requests_per_second"])
+        self.memory_governor = None
+        if self.config.get("max_buffered_records") or self.config.get("max_memory_mb"):
+            self.memory_governor = MemoryGovernor(
+                self.logger,
+                max_buffered_records=self.config.get("max_buffered_records"),
+                max_memory_mb=self.config.get("max_memory_mb"),
+            )
+        self.rollups = None
+        if self.config.get("rollups"):
+            if (self.config.get("shard_count") or 1) > 1:
+                raise ValueError(
+                    "rollups cannot be combined with sharding, as every shard would "
+                    "emit partial totals under the same CampaignID and Date."
+                )
+            self.rollups = RollupAggregator(
+                local_state_path(self.config, "rollups.json")
+            )
+
+    # The SDK marks `sync_all` as final but offers no hook around the whole run,
+    # which is needed for run profiling, parallel streams and the RSS summary.
+    # The SDK's own loop is still used for sequential runs, see `_sync_streams`.
+    def sync_all(self) -> None:  # type: ignore[misc]
+        """Sync all streams, profiling the run if `profile_dir` is set."""
+        if self.profiler is None:
+            self._sync_streams()
+        else:
+            with self.profiler.profile_run():
+                self._sync_streams()
+        if self.memory_governor is not None:
+            self.memory_governor.log_high_water()
+
+    def _sync_streams(self) -> None:
+        """Sync streams one after another, or concurrently if configured."""
+        max_parallel_streams = self.config.get("max_parallel_streams") or 1
+        if max_parallel_streams <= 1:
+            super().sync_all()
+            return
+
+        self._reset_state_progress_markers()
+        self._set_compatible_replication_methods()
+        streams = []
+        rollup_streams = []
+        for stream in self.streams.values():
+            if not stream.selected and not stream.has_selected_descendents:
+                self.logger.info(f"Skipping deselected stream '{stream.name}'.")
+                continue
+            if stream.parent_stream_type:
+                continue
+            if isinstance(stream, tuple(ROLLUP_STREAM_TYPES)):
+                rollup_streams.append(stream)
+                continue
+            streams.append(stream)
+        scheduler = StreamScheduler(max_parallel_streams, self.logger)
+        scheduler.run(streams, self._sync_stream)
+        for stream in rollup_streams:
+            self._sync_stream(stream)
+
+    @staticmethod
+    def _sync_stream(stream: Stream) -> None:
+        stream.sync()
+        with OUTPUT_LOCK:
+            stream.finalize_state_progress_markers()
+
     def discover_streams(self) -> List[Stream]:
         """Return a list of discovered streams."""
-        return [stream_class(tap=self) for stream_class in STREAM_TYPES]
+        stream_types = STREAM_TYPES
+        if self.config.get("content_streams"):
+            stream_types = stream_types + CONTENT_STREAM_TYPES
+        if self.config.get("email_events"):
+            stream_types = stream_types + MERGED_STREAM_TYPES
+        if self.config.get("event_log_dir"):
+            stream_types = stream_types + EVENT_LOG_STREAM_TYPES
+        if self.config.get("rollups"):
+            stream_types = stream_types + ROLLUP_STREAM_TYPES
+        return [stream_class(tap=self) for stream_class in stream_types]
@@ -0,0 +1,121 @@
+"""Tests batch file output."""
+
+import gzip
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from tap_mailjet.batch import BatchWriter
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import SAMPLE_CONFIG, read_messages, response
+
+SCHEMA = {
+    "properties": {
+        "ID": {"type": ["integer"]},
+        "Subject": {"type": ["string", "null"]},
+    }
+}
+CONTACTSLISTS = [{"ID": 1, "Name": "a"}, {"ID": 2, "Name": "b"}]
+
+
+def _read_jsonl_gz(uri: str) -> list:
+    with gzip.open(uri.replace("file://", "", 1), "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_batch_writer_rotates_between_pages(tmp_path):
+    """Files are rotated once a page reaches the row budget."""
+    writer = BatchWriter(
+        "message",
+        {"storage": {"root": str(tmp_path)}, "batch_size_rows": 3},
+        SCHEMA,
+    )
+    writer.write_page([{"ID": 1}, {"ID": 2}])
+    assert not writer.is_full
+    writer.write_page([{"ID": 3}, {"ID": 4}])
+    assert writer.is_full
+    first = writer.close_file()
+    writer.write_page([{"ID": 5}])
+    second = writer.close_file()
+
+    assert writer.close_file() is None
+    assert [r["ID"] for r in _read_jsonl_gz(first)] == [1, 2, 3, 4]
+    assert [r["ID"] for r in _read_jsonl_gz(second)] == [5]
+
+
+def test_batch_writer_rejects_unsupported_compression(tmp_path):
+    """Codecs not supported by the batch format fail instead of being ignored."""
+    with pytest.raises(ValueError, match="snappy"):
+        BatchWriter(
+            "message",
+            {"encoding": {"format": "jsonl", "compression": "snappy"}},
+            SCHEMA,
+        )
+
+
+@patch("tap_mailjet.client.Client")
+def test_sync_emits_batch_messages(mocked_mailjet_client, tmp_path, capsys):
+    """Batch mode emits BATCH messages, each followed by STATE, and no RECORDs."""
+    client = mocked_mailjet_client.return_value
+    client.contactslist.get.return_value = response(CONTACTSLISTS)
+    config = dict(
+        SAMPLE_CONFIG,
+        batch_config={"storage": {"root": str(tmp_path)}},
+    )
+    tap = Tapmailjet(config=config)
+    tap.streams["contactslist"].sync()
+
+    messages = read_messages(capsys)
+    types = [m["type"] for m in messages]
+    assert "RECORD" not in types
+    assert types[-2:] == ["BATCH", "STATE"]
+    manifest = messages[-2]["manifest"]
+    assert Path(manifest[0].replace("file://", "", 1)).exists()
+    assert [r["ID"] for r in _read_jsonl_gz(manifest[0])] == [1, 2]
+
+
+def test_page_to_record_batch_types_columns_from_schema():
+    """Timestamps, integers and booleans are typed from the stream schema."""
+    from tap_mailjet.arrow import arrow_schema, page_to_record_batch
+    from tap_mailjet.streams import MessageStream
+
+    schema = arrow_schema(
+        MessageStream.schema, ["ID", "ArrivedAt", "IsOpenTracked", "Subject"]
+    )
+    batch = page_to_record_batch(
+        [
+            {"ID": 1, "ArrivedAt": "2022-02-07T12:00:00Z", "IsOpenTracked": True},
+            {"ID": 2, "ArrivedAt": "", "Subject": "Hi"},
+        ],
+        schema,
+    )
+
+    assert str(batch.schema.field("ArrivedAt").type) == "timestamp[us, tz=UTC]"
+    assert str(batch.schema.field("ID").type) == "int64"
+    assert batch.column(1).null_count == 1
+    assert batch.to_pydict()["IsOpenTracked"] == [True, None]
+    assert batch.to_pydict()["Subject"] == [None, "Hi"]
+
+
+@patch("tap_mailjet.client.Client")
+def test_parquet_batches_apply_stream_maps(mocked_mailjet_client, tmp_path):
+    """Stream maps are applied to Parquet batches instead of being skipped."""
+    import pyarrow.parquet as pq
+
+    client = mocked_mailjet_client.return_value
+    client.contactslist.get.return_value = response(CONTACTSLISTS)
+    config = dict(
+        SAMPLE_CONFIG,
+        batch_config={
+            "encoding": {"format": "parquet", "compression": "none"},
+            "storage": {"root": str(tmp_path)},
+        },
+        stream_maps={"contactslist": {"__alias__": "lists", "Label": "Name.upper()"}},
+    )
+    tap = Tapmailjet(config=config)
+    tap.streams["contactslist"].sync()
+
+    (path,) = tmp_path.glob("lists-*.parquet")
+    assert pq.read_table(str(path)).to_pydict()["Label"] == ["A", "B"]
@@ -0,0 +1,46 @@
+"""Tests change-aware template content extraction."""
+
+from unittest.mock import patch
+
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import (
+    SAMPLE_CONFIG,
+    read_messages,
+    records_of,
+    response,
+)
+
+
+def _content(id):
+    return response(
+        [{"Html-part": f"<p>{id}</p>", "Text-part": str(id), "Headers": {}}]
+    )
+
+
+def _sync_templates(mocked_mailjet_client, templates, config, capsys):
+    client = mocked_mailjet_client.return_value
+    client.template.get.return_value = response(templates)
+    client.template_detailcontent.get.reset_mock()
+    client.template_detailcontent.get.side_effect = _content
+    Tapmailjet(config=config).streams["templatecontent"].sync()
+    return records_of(read_messages(capsys))
+
+
+@patch("tap_mailjet.client.Client")
+def test_content_is_only_refetched_when_parent_changed(
+    mocked_mailjet_client, tmp_path, capsys
+):
+    """A second run only fetches templates whose LastUpdatedAt changed."""
+    config = dict(SAMPLE_CONFIG, content_streams=True, local_state_dir=str(tmp_path))
+    templates = [
+        {"ID": 1, "LastUpdatedAt": "2022-01-01T00:00:00Z"},
+        {"ID": 2, "LastUpdatedAt": "2022-01-01T00:00:00Z"},
+    ]
+    records = _sync_templates(mocked_mailjet_client, templates, config, capsys)
+    assert [r["Html-part"] for r in records] == ["<p>1</p>", "<p>2</p>"]
+
+    templates[1] = {"ID": 2, "LastUpdatedAt": "2022-02-01T00:00:00Z"}
+    records = _sync_templates(mocked_mailjet_client, templates, config, capsys)
+    assert [r["ID"] for r in records] == [2]
+    detail = mocked_mailjet_client.return_value.template_detailcontent
+    assert detail.get.call_count == 1
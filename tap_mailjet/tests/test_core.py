@@ -1,7 +1,9 @@
 """Tests standard tap features using the built-in SDK tests library."""
 
 import datetime
-from unittest.mock import patch
+import json
+from typing import Any, Callable, List
+from unittest.mock import MagicMock, patch
 
 from singer_sdk.testing import get_standard_tap_tests
 
@@ -14,6 +16,33 @@ SAMPLE_CONFIG = {
 }
 
 
+def response(rows: List[dict], **fields: Any) -> MagicMock:
+    """Return a mocked API response holding one page of `rows`.
+
+    `fields` override or add to the `Count` and `Data` fields of the body.
+    """
+    data = dict({"Count": len(rows), "Data": rows}, **fields)
+    return MagicMock(status_code=200, json=MagicMock(return_value=data))
+
+
+def paged(rows: List[dict]) -> Callable[..., MagicMock]:
+    """Return a mocked `get` answering paged requests from `rows`."""
+    def get(filters: dict) -> MagicMock:
+        offset = filters.get("Offset", 0)
+        return response(rows[offset:][:filters["Limit"]])
+    return get
+
+
+def read_messages(capsys) -> List[dict]:
+    """Return the Singer messages written to stdout since the last read."""
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def records_of(messages: List[dict]) -> List[dict]:
+    """Return the records of the RECORD messages among `messages`."""
+    return [m["record"] for m in messages if m["type"] == "RECORD"]
+
+
 # Run standard built-in tap tests from the SDK:
 @patch('tap_mailjet.client.Client')
 def test_standard_tap_tests(mocked_mailjet_client):
@@ -27,3 +56,35 @@ def test_standard_tap_tests(mocked_mailjet_client):
 
 
 # TODO: Create additional tests as appropriate for your tap.
+
+
+@patch('tap_mailjet.client.Client')
+def test_profile_dir_writes_artifacts(mocked_mailjet_client, tmp_path):
+    """Profiling writes pstats files and a phase summary per stream."""
+    client = mocked_mailjet_client.return_value
+    client.contactslist.get.return_value = response([{"ID": 1}])
+    tap = Tapmailjet(config=dict(SAMPLE_CONFIG, profile_dir=str(tmp_path)))
+    with tap.profiler.profile_run():
+        tap.streams["contactslist"].sync()
+
+    phases = json.loads((tmp_path / "phases.json").read_text())
+    assert {"http", "json_decode", "conform", "stdout"} <= set(phases["contactslist"])
+    assert (tmp_path / "run.pstats").exists()
+    assert (tmp_path / "stream-contactslist.pstats").exists()
+
+
+@patch('tap_mailjet.client.Client')
+def test_stream_schemas_are_valid(mocked_mailjet_client, tmp_path):
+    """The schemas of all streams, including optional ones, are valid JSON Schema."""
+    from jsonschema import Draft4Validator
+
+    config = dict(
+        SAMPLE_CONFIG,
+        content_streams=True,
+        email_events=True,
+        event_log_dir=str(tmp_path),
+        rollups=True,
+        local_state_dir=str(tmp_path),
+    )
+    for stream in Tapmailjet(config=config).streams.values():
+        Draft4Validator.check_schema(stream.schema)
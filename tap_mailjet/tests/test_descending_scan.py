@@ -0,0 +1,44 @@
+"""Tests client-side incremental sync of templates."""
+
+from unittest.mock import patch
+
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import (
+    SAMPLE_CONFIG,
+    paged,
+    read_messages,
+    records_of,
+)
+
+TEMPLATES = [
+    {"ID": id, "LastUpdatedAt": f"2022-03-{day:02d}T00:00:00Z"}
+    for id, day in zip(range(1, 6), range(20, 0, -4))
+]
+# Never modified, so neither emitted behind the bookmark nor ending the scan
+TEMPLATES.insert(1, {"ID": 6, "LastUpdatedAt": None})
+
+
+@patch("tap_mailjet.client.mailjetStream.limit", 2)
+@patch("tap_mailjet.client.Client")
+def test_scan_stops_behind_bookmark(mocked_mailjet_client, capsys):
+    """Only the pages up to the first row behind the bookmark are requested."""
+    client = mocked_mailjet_client.return_value
+    client.template.get.side_effect = paged(TEMPLATES)
+    state = {
+        "bookmarks": {
+            "template": {
+                "replication_key": "LastUpdatedAt",
+                "replication_key_value": "2022-03-12T00:00:00Z",
+            }
+        }
+    }
+    config = dict(SAMPLE_CONFIG, client_side_incremental=True)
+    Tapmailjet(config=config, state=state).streams["template"].sync()
+
+    messages = read_messages(capsys)
+    assert [r["ID"] for r in records_of(messages)] == [1, 6, 2, 3]
+    assert client.template.get.call_count == 3
+    filters = client.template.get.call_args.kwargs["filters"]
+    assert filters["Sort"] == "LastUpdatedAt DESC"
+    bookmark = messages[-1]["value"]["bookmarks"]["template"]
+    assert bookmark["replication_key_value"] == "2022-03-20T00:00:00Z"
@@ -0,0 +1,53 @@
+"""Tests the time-ordered merge of open, click and bounce events."""
+
+from unittest.mock import patch
+
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import (
+    SAMPLE_CONFIG,
+    paged,
+    read_messages,
+    records_of,
+)
+
+
+@patch("tap_mailjet.client.mailjetStream.limit", 2)
+@patch("tap_mailjet.client.Client")
+def test_sources_are_merged_in_time_order(mocked_mailjet_client, capsys):
+    """Events of all sources come out ordered by time with a single bookmark."""
+    client = mocked_mailjet_client.return_value
+    client.openinformation.get.side_effect = paged(
+        [
+            {"ID": 1, "OpenedAt": "2022-03-01T10:00:00Z", "CampaignID": 5},
+            {"ID": 2, "OpenedAt": "2022-03-01T12:00:00Z", "CampaignID": 5},
+            {"ID": 3, "OpenedAt": "2022-03-01T15:00:00Z", "CampaignID": 5},
+        ]
+    )
+    client.clickstatistics.get.side_effect = paged(
+        [
+            {"ID": 1, "ClickedAt": "2022-03-01T11:00:00Z", "Url": "https://a"},
+            {"ID": 2, "ClickedAt": "2022-03-01T16:00:00Z", "Url": "https://b"},
+        ]
+    )
+    client.bouncestatistics.get.side_effect = paged(
+        [{"ID": 1, "BouncedAt": "2022-03-01T13:00:00Z", "StateID": 1}]
+    )
+    Tapmailjet(config=dict(SAMPLE_CONFIG, email_events=True)).streams[
+        "email_events"
+    ].sync()
+
+    messages = read_messages(capsys)
+    records = records_of(messages)
+    assert [(r["EventType"], r["ID"]) for r in records] == [
+        ("open", 1),
+        ("click", 1),
+        ("open", 2),
+        ("bounce", 1),
+        ("open", 3),
+        ("click", 2),
+    ]
+    assert records[1]["Url"] == "https://a"
+    filters = client.openinformation.get.call_args.kwargs["filters"]
+    assert filters["Sort"] == "OpenedAt ASC"
+    bookmark = messages[-1]["value"]["bookmarks"]["email_events"]
+    assert bookmark["replication_key_value"] == "2022-03-01T16:00:00Z"
@@ -0,0 +1,100 @@
+"""Tests cached dimension lookups for message enrichment."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tap_mailjet.enrichment import (
+    MESSAGE_DIMENSIONS,
+    Enricher,
+    LookupFailed,
+    LRUCache,
+)
+
+
+def _fake_conn():
+    conn = MagicMock()
+    for resource, field in [
+        ("sender", "Email"),
+        ("domainstatistics", "Domain"),
+        ("campaign", "Subject"),
+    ]:
+
+        def get(id, field=field):
+            response = MagicMock(status_code=200)
+            response.json.return_value = {"Data": [{field: f"{field}-{id}"}]}
+            return response
+
+        getattr(conn, resource).get.side_effect = get
+    return conn
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """The least recently used key is evicted once the cache is full."""
+    cache = LRUCache(2, [[1, "a"], [2, "b"]])
+    cache.get(1)
+    cache.put(3, "c")
+
+    assert 2 not in cache
+    assert cache.items() == [[1, "a"], [3, "c"]]
+
+
+def test_enricher_looks_up_each_id_once_across_runs(tmp_path):
+    """Distinct IDs are looked up once and the cache is reused by the next run."""
+    cache_path = tmp_path / "cache.json"
+    conn = _fake_conn()
+    page = [
+        {"ID": i, "SenderID": 1, "DestinationID": 7, "CampaignID": i % 2 or None}
+        for i in range(1000)
+    ]
+    enricher = Enricher(conn, MESSAGE_DIMENSIONS, cache_path)
+    enricher.enrich(page)
+    enricher.save()
+
+    assert enricher.lookup_count == 3
+    assert page[1]["SenderEmail"] == "Email-1"
+    assert page[1]["CampaignSubject"] == "Subject-1"
+    assert page[0]["CampaignSubject"] is None
+
+    next_run = Enricher(_fake_conn(), MESSAGE_DIMENSIONS, cache_path)
+    next_run.enrich([{"ID": 1, "SenderID": 1, "DestinationID": 7}])
+    assert next_run.lookup_count == 0
+
+
+def test_enricher_caches_only_unknown_ids(tmp_path):
+    """Unknown IDs are cached as None, transient errors retried, others raised."""
+    conn = MagicMock()
+    statuses = {1: [404], 2: [503, 200], 3: [401]}
+
+    def get(id):
+        response = MagicMock(status_code=statuses[id].pop(0))
+        response.json.return_value = {"Data": [{"Email": f"Email-{id}"}]}
+        return response
+
+    conn.sender.get.side_effect = get
+    cache_path = tmp_path / "cache.json"
+    enricher = Enricher(conn, MESSAGE_DIMENSIONS[:1], cache_path)
+    page = [{"ID": 1, "SenderID": 1}, {"ID": 2, "SenderID": 2}]
+    with patch("tap_mailjet.enrichment.time.sleep"):
+        enricher.enrich(page)
+        with pytest.raises(LookupFailed, match="HTTP 401"):
+            enricher.enrich([{"ID": 3, "SenderID": 3}])
+    enricher.save()
+
+    assert [row["SenderEmail"] for row in page] == [None, "Email-2"]
+    assert Enricher(conn, MESSAGE_DIMENSIONS[:1], cache_path).caches[
+        "sender"
+    ].items() == [[1, None], [2, "Email-2"]]
+
+
+def test_enricher_fills_pages_larger_than_the_cache(tmp_path):
+    """Rows are filled even if the page holds more new IDs than the cache fits."""
+    enricher = Enricher(
+        _fake_conn(), MESSAGE_DIMENSIONS[:1], tmp_path / "cache.json", cache_size=2
+    )
+    page = [{"ID": i, "SenderID": i} for i in range(1, 6)]
+    enricher.enrich(page)
+
+    assert [row["SenderEmail"] for row in page] == [f"Email-{i}" for i in range(1, 6)]
+    assert enricher.lookup_count == 5
+    assert len(enricher.caches["sender"]) == 2
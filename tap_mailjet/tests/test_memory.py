@@ -0,0 +1,49 @@
+"""Tests the memory-bounded mode."""
+
+import logging
+import threading
+import time
+
+import pytest
+
+from tap_mailjet.memory import MemoryGovernor, MemoryLimitExceeded
+
+LOGGER = logging.getLogger("tap-mailjet")
+
+
+def test_pages_wait_for_buffered_records_to_be_written():
+    """A page is only fetched once earlier pages were consumed."""
+    governor = MemoryGovernor(LOGGER, max_buffered_records=20)
+    fetched = []
+
+    def pages(stream):
+        for number in range(3):
+            fetched.append((stream, number))
+            yield [number] * 10
+
+    first = governor.bounded(pages("a"), 10)
+    second = governor.bounded(pages("b"), 10)
+    next(first)
+    next(second)
+    assert governor.buffered_records == 20
+
+    third = governor.bounded(pages("c"), 10)
+    thread = threading.Thread(target=next, args=(third,))
+    thread.start()
+    time.sleep(0.1)
+    assert ("c", 0) not in fetched
+
+    # Stopping "b" after its page was written releases its records
+    second.close()
+    thread.join(timeout=5)
+    assert ("c", 0) in fetched
+    assert governor.buffered_records == 20
+
+
+def test_memory_ceiling_fails_when_nothing_can_be_released():
+    """Exceeding the ceiling with no buffered page left raises a clear error."""
+    governor = MemoryGovernor(LOGGER, max_memory_mb=1)
+    with pytest.raises(MemoryLimitExceeded, match="max_memory_mb"):
+        next(governor.bounded(iter([[1]]), 1))
+    assert governor.high_water_rss > 0
+    assert governor.buffered_records == 0
@@ -0,0 +1,47 @@
+"""Tests the raw passthrough mode."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from tap_mailjet.passthrough import RawRecord, decode_response
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import SAMPLE_CONFIG
+
+RESPONSE = """{ "Count" : 2,
+  "Data" : [
+    {"ID":1,"ArrivedAt":"2022-03-01T10:00:00Z","Subject":"Caf\\u00e9 [1]"},
+    {"ID": 2, "ArrivedAt": "2022-03-01T11:00:00Z", "Unknown": {"a": [1, 2]}}
+  ],
+  "Total" : 2 }"""
+
+
+def test_decode_response_keeps_raw_records():
+    """Records are decoded as usual and keep their exact raw JSON text."""
+    data = decode_response(RESPONSE)
+    assert data == json.loads(RESPONSE)
+    assert all(isinstance(record, RawRecord) for record in data["Data"])
+    assert data["Data"][0].raw_json == (
+        '{"ID":1,"ArrivedAt":"2022-03-01T10:00:00Z","Subject":"Caf\\u00e9 [1]"}'
+    )
+    assert decode_response('{"Count": 0, "Data": []}') == {"Count": 0, "Data": []}
+
+
+@patch("tap_mailjet.client.Client")
+def test_raw_records_are_written_unchanged(mocked_mailjet_client, capsys):
+    """Records with schema properties only are emitted from their raw text."""
+    client = mocked_mailjet_client.return_value
+    client.message.get.return_value = MagicMock(text=RESPONSE)
+    config = dict(SAMPLE_CONFIG, raw_passthrough=True)
+    Tapmailjet(config=config).streams["message"].sync()
+
+    lines = capsys.readouterr().out.splitlines()
+    records = [line for line in lines if '"type": "RECORD"' in line]
+    assert '"record": {"ID":1,"ArrivedAt":"2022-03-01T10:00:00Z",' in records[0]
+    assert json.loads(records[0])["record"]["Subject"] == "Café [1]"
+    # Undeclared properties need conformance, so that record is re-encoded
+    assert json.loads(records[1])["record"] == {
+        "ID": 2,
+        "ArrivedAt": "2022-03-01T11:00:00Z",
+    }
+    state = json.loads(lines[-1])["value"]["bookmarks"]["message"]
+    assert state["replication_key_value"] == "2022-03-01T11:00:00Z"
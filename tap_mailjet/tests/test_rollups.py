@@ -0,0 +1,70 @@
+"""Tests incremental per-campaign, per-day engagement rollups."""
+
+from unittest.mock import patch
+
+import pytest
+
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import (
+    SAMPLE_CONFIG,
+    read_messages,
+    records_of,
+    response,
+)
+
+
+def _sync(mocked_mailjet_client, config, rows, capsys):
+    client = mocked_mailjet_client.return_value
+    tap = Tapmailjet(config=config)
+    for name in ["message", "openinformation", "clickstatistics", "bouncestatistics"]:
+        getattr(client, name).get.return_value = response(rows.get(name, []))
+        tap.streams[name].sync()
+    capsys.readouterr()
+    tap.streams["dailycampaignengagement"].sync()
+    return records_of(read_messages(capsys))
+
+
+@patch("tap_mailjet.client.Client")
+def test_rollups_emit_changed_buckets_only(mocked_mailjet_client, tmp_path, capsys):
+    """Each run adds new events only and emits the buckets that changed."""
+    config = dict(SAMPLE_CONFIG, rollups=True, local_state_dir=str(tmp_path))
+    rows = {
+        "message": [{"ID": 21, "CampaignID": 2, "ArrivedAt": "2022-03-01T09:00:00Z"}],
+        "openinformation": [
+            {"ID": 1, "CampaignID": 1, "OpenedAt": "2022-03-01T10:00:00Z"},
+            {"ID": 2, "CampaignID": 1, "OpenedAt": "2022-03-01T12:00:00Z"},
+            {"ID": 3, "CampaignID": 2, "OpenedAt": "2022-03-02T12:00:00Z"},
+        ],
+        # The message of the second click is only synced by the next run
+        "clickstatistics": [
+            {"ID": 1, "MessageID": 21, "ClickedAt": "2022-03-02T13:00:00Z"},
+            {"ID": 2, "MessageID": 31, "ClickedAt": "2022-03-02T14:00:00Z"},
+        ],
+        "bouncestatistics": [
+            {"ID": 1, "CampaignID": 2, "BouncedAt": "2022-03-02T13:00:00Z"}
+        ],
+    }
+    assert _sync(mocked_mailjet_client, config, rows, capsys) == [
+        {"CampaignID": 1, "Date": "2022-03-01", "Opens": 2, "Clicks": 0, "Bounces": 0},
+        {"CampaignID": 2, "Date": "2022-03-02", "Opens": 1, "Clicks": 1, "Bounces": 1},
+    ]
+
+    # The rows at the bookmark are read again and must not be counted twice
+    rows["message"] = [{"ID": 31, "CampaignID": 3, "ArrivedAt": "2022-03-02T09:00:00Z"}]
+    rows["openinformation"] = rows["openinformation"][2:] + [
+        {"ID": 4, "CampaignID": 2, "OpenedAt": "2022-03-02T14:00:00Z"}
+    ]
+    assert _sync(mocked_mailjet_client, config, rows, capsys) == [
+        {"CampaignID": 2, "Date": "2022-03-02", "Opens": 2, "Clicks": 1, "Bounces": 1},
+        {"CampaignID": 3, "Date": "2022-03-02", "Opens": 0, "Clicks": 1, "Bounces": 0},
+    ]
+    # Messages are only paged, never looked up one by one
+    message_calls = mocked_mailjet_client.return_value.message.get.call_args_list
+    assert all("filters" in call.kwargs for call in message_calls)
+
+
+def test_rollups_reject_sharding():
+    """Shards would emit partial totals under the same primary key."""
+    config = dict(SAMPLE_CONFIG, rollups=True, shard_count=2, shard_index=0)
+    with pytest.raises(ValueError, match="sharding"):
+        Tapmailjet(config=config)
@@ -0,0 +1,64 @@
+"""Tests the sample mode."""
+
+from unittest.mock import patch
+
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import (
+    SAMPLE_CONFIG,
+    paged,
+    read_messages,
+    records_of,
+    response,
+)
+
+ROWS = [{"ID": i, "ArrivedAt": "2022-02-01T00:00:00Z"} for i in range(10000)]
+
+
+def _get(filters):
+    if filters.get("countOnly"):
+        return response([], Count=1, Total=len(ROWS))
+    return paged(ROWS)(filters)
+
+
+@patch("tap_mailjet.client.Client")
+def test_sample_spreads_requests_without_state(mocked_mailjet_client, capsys):
+    """Records are sampled from spread-out offsets and no state is written."""
+    client = mocked_mailjet_client.return_value
+    client.contact.get.side_effect = _get
+    client.message.get.side_effect = _get
+    config = dict(SAMPLE_CONFIG, sample_size=10, start_date="2022-01-01T00:00:00Z")
+    tap = Tapmailjet(config=config)
+    tap.streams["contact"].sync()
+
+    messages = read_messages(capsys)
+    records = records_of(messages)
+    assert len(records) == 10
+    assert {r["ID"] // 2500 for r in records} == {0, 1, 2, 3}
+    assert not [m for m in messages if m["type"] == "STATE"]
+
+    tap.streams["message"].sync()
+    calls = client.message.get.call_args_list
+    windows = sorted(call.kwargs["filters"]["FromTS"] for call in calls)
+    assert len(windows) == 4
+    assert windows[0] == "2022-01-01T00:00:00Z"
+    assert all(call.kwargs["filters"]["Limit"] == 3 for call in calls)
+
+
+@patch("tap_mailjet.client.Client")
+def test_sample_leaves_local_state_untouched(mocked_mailjet_client, tmp_path):
+    """Lookups of sampled messages are not persisted to the enrichment cache."""
+    rows = [{"ID": 1, "ArrivedAt": "2022-02-01T00:00:00Z", "SenderID": 1}]
+    client = mocked_mailjet_client.return_value
+    client.message.get.return_value = response(rows)
+    client.sender.get.return_value = response([{"Email": "a@b.c"}])
+    config = dict(
+        SAMPLE_CONFIG,
+        sample_size=10,
+        start_date="2022-01-01T00:00:00Z",
+        enrich_messages=True,
+        local_state_dir=str(tmp_path),
+    )
+    Tapmailjet(config=config).streams["message"].sync()
+
+    assert client.sender.get.called
+    assert not list(tmp_path.iterdir())
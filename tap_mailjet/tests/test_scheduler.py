@@ -0,0 +1,48 @@
+"""Tests history-driven stream scheduling."""
+
+import time
+from unittest.mock import patch
+
+from tap_mailjet.scheduler import StreamScheduler
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import SAMPLE_CONFIG, read_messages, records_of
+
+
+def _state(durations):
+    return {
+        "bookmarks": {
+            name: {"sync_stats": {"duration_seconds": duration, "record_count": 1}}
+            for name, duration in durations.items()
+        }
+    }
+
+
+@patch("tap_mailjet.client.Client")
+def test_order_starts_unknown_and_longest_streams_first(mocked_mailjet_client):
+    """Streams without history come first, then by previous duration."""
+    tap = Tapmailjet(config=SAMPLE_CONFIG)
+    tap.load_state(_state({"message": 300, "contact": 30, "template": 1}))
+    streams = [tap.streams[name] for name in ["template", "contact", "message"]]
+    streams.append(tap.streams["campaign"])
+
+    ordered = StreamScheduler(2, tap.logger).order(streams)
+
+    assert [s.name for s in ordered] == ["campaign", "message", "contact", "template"]
+
+
+@patch("tap_mailjet.client.Client")
+def test_parallel_sync_records_history_in_state(mocked_mailjet_client, capsys):
+    """Concurrent syncs keep messages intact and store durations in state."""
+    response = mocked_mailjet_client.return_value.contactslist.get.return_value
+    response.json.side_effect = lambda: time.sleep(0.01) or {
+        "Count": 2,
+        "Data": [{"ID": 1}, {"ID": 2}],
+    }
+    tap = Tapmailjet(config=dict(SAMPLE_CONFIG, max_parallel_streams=4))
+    tap.sync_all()
+
+    messages = read_messages(capsys)
+    assert len(records_of(messages)) == 2
+    stats = messages[-1]["value"]["bookmarks"]["contactslist"]["sync_stats"]
+    assert stats["record_count"] == 2
+    assert stats["duration_seconds"] > 0
@@ -0,0 +1,97 @@
+"""Tests sharding streams across tap processes and merging shard states."""
+
+from unittest.mock import patch
+
+import pytest
+
+from tap_mailjet.shards import merge_states
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import SAMPLE_CONFIG, response
+
+SHARD_CONFIG = dict(
+    SAMPLE_CONFIG,
+    start_date="2022-01-01T00:00:00Z",
+    end_date="2022-01-04T00:00:00Z",
+    shard_count=3,
+)
+
+
+def _response(count):
+    data = [{"ID": i} for i in range(count)]
+    return response(data)
+
+
+@patch("tap_mailjet.client.Client")
+def test_time_slices_are_disjoint(mocked_mailjet_client, capsys):
+    """FromTS streams of each shard are restricted to contiguous time slices."""
+    client = mocked_mailjet_client.return_value
+    client.message.get.return_value = _response(0)
+    slices = []
+    for index in range(3):
+        tap = Tapmailjet(config=dict(SHARD_CONFIG, shard_index=index))
+        tap.streams["message"].sync()
+        filters = client.message.get.call_args.kwargs["filters"]
+        slices.append((filters["FromTS"], filters["ToTS"]))
+        shard_state = tap.streams["message"].stream_state["shard"]
+        assert shard_state["completed"]
+    assert slices == [
+        ("2022-01-01T00:00:00Z", "2022-01-02T00:00:00Z"),
+        ("2022-01-02T00:00:00Z", "2022-01-03T00:00:00Z"),
+        ("2022-01-03T00:00:00Z", "2022-01-04T00:00:00Z"),
+    ]
+
+
+@patch("tap_mailjet.client.mailjetStream.limit", 10)
+@patch("tap_mailjet.client.Client")
+def test_pages_are_striped(mocked_mailjet_client, capsys):
+    """Streams without time filters request every shard_count-th page by ID."""
+    client = mocked_mailjet_client.return_value
+    offsets = []
+
+    def get_contacts(filters):
+        offsets.append(filters["Offset"])
+        assert filters["Sort"] == "ID ASC"
+        return _response(10 if filters["Offset"] < 50 else 3)
+
+    client.contact.get.side_effect = get_contacts
+    Tapmailjet(config=dict(SHARD_CONFIG, shard_index=1)).streams["contact"].sync()
+    assert offsets == [10, 40, 70]
+
+
+def _shard_state(index, completed, value=None):
+    stream_state = {
+        "replication_key": "ArrivedAt",
+        "shard": {
+            "index": index,
+            "count": 3,
+            "completed": completed,
+            "from": f"2022-01-0{index + 1}T00:00:00Z",
+            "until": f"2022-01-0{index + 2}T00:00:00Z",
+        },
+        "sync_stats": {"duration_seconds": 10 + index, "record_count": 5},
+    }
+    if value:
+        stream_state["replication_key_value"] = value
+    return {"bookmarks": {"message": stream_state}}
+
+
+def test_merge_states_resumes_at_first_unfinished_slice():
+    """The merged bookmark is the end of the completed prefix of slices."""
+    states = [
+        _shard_state(0, True, "2022-01-01T23:00:00Z"),
+        _shard_state(1, False, "2022-01-02T06:00:00Z"),
+        _shard_state(2, True, "2022-01-03T23:00:00Z"),
+    ]
+    merged = merge_states(states)["bookmarks"]["message"]
+    assert merged == {
+        "replication_key": "ArrivedAt",
+        "replication_key_value": "2022-01-02T06:00:00Z",
+        "sync_stats": {"duration_seconds": 12, "record_count": 15},
+    }
+
+    states[1] = _shard_state(1, True)
+    merged = merge_states(states)["bookmarks"]["message"]
+    assert merged["replication_key_value"] == "2022-01-04T00:00:00Z"
+
+    with pytest.raises(ValueError, match="shards \\[1\\]"):
+        merge_states([states[0], states[2]])
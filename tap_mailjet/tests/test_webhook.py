@@ -0,0 +1,76 @@
+"""Tests the Event API webhook receiver and the event log streams."""
+
+import base64
+import json
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+import pytest
+
+from tap_mailjet.tap import Tapmailjet
+from tap_mailjet.tests.test_core import SAMPLE_CONFIG, read_messages, records_of
+from tap_mailjet.webhook import EventLog, WebhookServer
+
+
+@pytest.fixture
+def receiver(tmp_path):
+    event_log = EventLog(tmp_path, segment_bytes=50)
+    server = WebhookServer(("127.0.0.1", 0), event_log, "mailjet", "secret")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(server, payload, password="secret"):
+    credentials = base64.b64encode(f"mailjet:{password}".encode()).decode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{server.server_address[1]}/",
+        data=json.dumps(payload).encode(),
+        headers={"Authorization": f"Basic {credentials}"},
+    )
+    try:
+        return urllib.request.urlopen(request).status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def _sync(config, state, capsys):
+    tap = Tapmailjet(config=config, state=state)
+    tap.streams["openevent"].sync()
+    messages = read_messages(capsys)
+    return records_of(messages), messages[-1]["value"]
+
+
+@patch("tap_mailjet.client.Client")
+def test_received_events_are_drained_incrementally(_, receiver, tmp_path, capsys):
+    """Posted events are logged durably and read once, after the bookmark."""
+    assert _post(receiver, {"event": "open", "MessageID": 1}) == 200
+    grouped = [{"event": "click", "MessageID": 1}, {"event": "open", "MessageID": 2}]
+    assert _post(receiver, grouped) == 200
+    assert _post(receiver, {"event": "open"}, password="wrong") == 401
+    assert _post(receiver, [{"MessageID": 3}]) == 400
+    assert len(EventLog(tmp_path).segments()) > 1
+
+    config = dict(SAMPLE_CONFIG, event_log_dir=str(tmp_path))
+    records, state = _sync(config, {}, capsys)
+    assert [(r["Offset"], r["MessageID"]) for r in records] == [(0, 1), (2, 2)]
+
+    assert _post(receiver, {"event": "open", "MessageID": 3}) == 200
+    records, _ = _sync(config, state, capsys)
+    assert [(r["Offset"], r["MessageID"]) for r in records] == [(3, 3)]
+
+
+def test_event_log_recovers_from_torn_write(tmp_path):
+    """A partially written last line is dropped when the log is reopened."""
+    EventLog(tmp_path).append([{"event": "open"}, {"event": "bounce"}])
+    segment = EventLog(tmp_path).segments()[-1][1]
+    with open(segment, "a", encoding="utf-8") as f:
+        f.write('{"offset": 2, "eve')
+    event_log = EventLog(tmp_path)
+    assert event_log.next_offset == 2
+    assert event_log.append([{"event": "click"}]) == [2]
+    assert [offset for offset, _ in event_log.read(1)] == [1, 2]
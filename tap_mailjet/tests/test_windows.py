@@ -0,0 +1,56 @@
+"""Tests density-aware window planning."""
+
+import datetime
+
+from tap_mailjet.windows import WindowPlanner
+
+START = datetime.datetime(2010, 1, 1, tzinfo=datetime.timezone.utc)
+END = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+# Two years of sparse activity followed by a busy month
+EVENTS = [
+    datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    + datetime.timedelta(days=7 * i)
+    for i in range(100)
+] + [
+    datetime.datetime(2021, 12, 1, tzinfo=datetime.timezone.utc)
+    + datetime.timedelta(minutes=10 * i)
+    for i in range(3000)
+]
+
+
+class CountingEvents:
+    """Count function over `EVENTS` that records how often it was called."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, start, end):
+        self.calls += 1
+        return sum(1 for event in EVENTS if start <= event < end)
+
+
+def test_plan_skips_empty_history_and_respects_target():
+    """Windows start at the first data and hold at most the target rows."""
+    planner = WindowPlanner(CountingEvents(), target_rows=500)
+    windows = planner.plan(START, END)
+
+    assert windows[0][0] >= EVENTS[0] - datetime.timedelta(hours=1)
+    assert all(count <= 500 for _, _, count in windows)
+    assert sum(count for _, _, count in windows) == len(EVENTS)
+    assert all(a[1] <= b[0] for a, b in zip(windows, windows[1:]))
+
+
+def test_plan_with_cache_only_probes_new_period():
+    """A cached plan is reused and only the period after it is probed."""
+    first_count = CountingEvents()
+    _, cache = WindowPlanner(first_count, target_rows=500).plan_with_cache(
+        START, END, None
+    )
+    second_count = CountingEvents()
+    later = END + datetime.timedelta(days=30)
+    windows, _ = WindowPlanner(second_count, target_rows=500).plan_with_cache(
+        START, later, cache
+    )
+
+    assert second_count.calls == 1
+    assert len(windows) == len(cache["windows"])
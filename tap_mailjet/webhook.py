@@ -0,0 +1,207 @@
+"""Receiver for Mailjet Event API webhooks, backed by a segmented on-disk log.
+
+The receiver accepts the event POSTs Mailjet sends for opens, clicks, bounces and
+other events, appends them durably to the log and only then acknowledges them,
+so Mailjet retries anything that was not persisted. The tap drains the log into
+streams, using the log offset as replication key.
+
+Run it with::
+
+    tap-mailjet-receiver --log-dir /var/lib/tap-mailjet/events --port 8080
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+SEGMENT_SUFFIX = ".jsonl"
+
+logger = logging.getLogger("tap-mailjet-receiver")
+
+
+class EventLog:
+    """Append-only event log split into segment files.
+
+    Every event gets a global, monotonically increasing offset. Segment files are
+    named after the offset of their first event, so readers can skip segments
+    entirely behind their starting offset.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        writable: bool = True,
+    ) -> None:
+        """Open the log in `directory`.
+
+        Writers recover the next offset from disk. Readers open the log with
+        `writable=False`, so they never touch files the receiver is appending to.
+        """
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self.next_offset = 0
+        if writable:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.next_offset = self._recover()
+
+    def segments(self) -> List[Tuple[int, Path]]:
+        """Return `(first offset, path)` of all segments, in offset order."""
+        return sorted(
+            (int(path.stem), path)
+            for path in self.directory.glob(f"*{SEGMENT_SUFFIX}")
+            if path.stem.isdigit()
+        )
+
+    def append(self, events: List[dict]) -> List[int]:
+        """Durably append `events` and return their offsets."""
+        received_at = int(time.time())
+        with self._lock:
+            segments = self.segments()
+            if not segments or segments[-1][1].stat().st_size >= self.segment_bytes:
+                path = self.directory / f"{self.next_offset:020d}{SEGMENT_SUFFIX}"
+            else:
+                path = segments[-1][1]
+            offsets = list(range(self.next_offset, self.next_offset + len(events)))
+            lines = "".join(
+                json.dumps({"offset": o, "received_at": received_at, "event": e}) + "\n"
+                for o, e in zip(offsets, events)
+            )
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self.next_offset += len(events)
+        return offsets
+
+    def read(self, from_offset: int = 0) -> Iterator[Tuple[int, dict]]:
+        """Yield `(offset, event)` for all events at or after `from_offset`."""
+        segments = self.segments()
+        for index, (first_offset, path) in enumerate(segments):
+            next_first = segments[index + 1][0] if index + 1 < len(segments) else None
+            if next_first is not None and next_first <= from_offset:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        # Partially written by a concurrent append
+                        return
+                    entry = json.loads(line)
+                    if entry["offset"] >= from_offset:
+                        yield entry["offset"], entry["event"]
+
+    def _recover(self) -> int:
+        """Return the next offset, dropping a torn last line left by a crash."""
+        segments = self.segments()
+        if not segments:
+            return 0
+        first_offset, path = segments[-1]
+        with open(path, "rb") as f:
+            data = f.read()
+        complete = data[: data.rfind(b"\n") + 1]
+        if len(complete) != len(data):
+            with open(path, "wb") as f:
+                f.write(complete)
+        return first_offset + complete.count(b"\n")
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Accept single or grouped Event API POSTs and append them to the log."""
+
+    event_log: EventLog
+    credentials: Optional[str] = None
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Persist the posted events, then acknowledge them."""
+        if self.credentials and self.headers.get("Authorization") != (
+            f"Basic {self.credentials}"
+        ):
+            self._respond(401)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self._respond(400)
+            return
+        events = payload if isinstance(payload, list) else [payload]
+        if not events or not all(isinstance(e, dict) and "event" in e for e in events):
+            self._respond(400)
+            return
+        self.event_log.append(events)
+        self._respond(200)
+
+    def log_message(self, format: str, *args) -> None:
+        """Log requests with the module logger instead of stderr."""
+        logger.debug(format, *args)
+
+    def _respond(self, status: int) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class WebhookServer(socketserver.ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server appending received events to an event log."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        event_log: EventLog,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+    ) -> None:
+        """Listen on `address`, optionally requiring HTTP basic auth."""
+        credentials = None
+        if username:
+            credentials = base64.b64encode(
+                f"{username}:{password or ''}".encode("utf-8")
+            ).decode("ascii")
+        handler = type(
+            "BoundWebhookHandler",
+            (WebhookHandler,),
+            {"event_log": event_log, "credentials": credentials},
+        )
+        super().__init__(address, handler)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the webhook receiver until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log-dir", required=True, help="Event log directory.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind to.")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on.")
+    parser.add_argument(
+        "--segment-bytes",
+        type=int,
+        default=DEFAULT_SEGMENT_BYTES,
+        help="Start a new log segment once the current one reaches this size.",
+    )
+    parser.add_argument("--username", help="Require HTTP basic auth with this user.")
+    parser.add_argument("--password", help="Password for HTTP basic auth.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    event_log = EventLog(Path(args.log_dir), segment_bytes=args.segment_bytes)
+    server = WebhookServer(
+        (args.host, args.port), event_log, args.username, args.password
+    )
+    logger.info(f"Receiving Mailjet events on {args.host}:{args.port}...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,143 @@
+"""Density-aware planning of FromTS/ToTS request windows.
+
+Instead of walking the history in fixed-width windows, the planner probes row
+counts and bisects the time range coarse-to-fine: empty periods are skipped after
+a single count, and dense periods are split until each window holds at most the
+target number of rows.
+"""
+
+import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+import pendulum
+
+CountFunction = Callable[[datetime.datetime, datetime.datetime], int]
+Window = Tuple[datetime.datetime, datetime.datetime]
+
+
+def format_ts(value: datetime.datetime) -> str:
+    """Format a timestamp the way it is sent to the API and stored in state."""
+    return value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_ts(value: str) -> datetime.datetime:
+    """Parse a timestamp from state or config."""
+    parsed = pendulum.parse(value)
+    if not isinstance(parsed, datetime.datetime):
+        raise ValueError(f"Expected a timestamp, got '{value}'.")
+    return parsed
+
+
+def normalize_ts(value: Any) -> Optional[str]:
+    """Return an event timestamp, given as string or unix time, formatted as UTC."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return format_ts(
+            datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+        )
+    return format_ts(parse_ts(value))
+
+
+class WindowPlanner:
+    """Plan request windows holding at most `target_rows` rows each."""
+
+    def __init__(
+        self,
+        count: CountFunction,
+        target_rows: int,
+        min_window: datetime.timedelta = datetime.timedelta(hours=1),
+    ) -> None:
+        """Initialize the planner.
+
+        Args:
+            count: Returns the number of rows between two timestamps.
+            target_rows: Preferred maximum number of rows per window.
+            min_window: Windows are never split below this width.
+        """
+        self.count = count
+        self.target_rows = target_rows
+        self.min_window = min_window
+
+    def find_first_data(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> Optional[datetime.datetime]:
+        """Binary search the earliest `min_window` period containing data."""
+        if not self.count(start, end):
+            return None
+        low, high = start, end
+        while high - low > self.min_window:
+            middle = low + (high - low) / 2
+            if self.count(low, middle):
+                high = middle
+            else:
+                low = middle
+        return low
+
+    def plan(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> List[Tuple[datetime.datetime, datetime.datetime, int]]:
+        """Return `(from, to, count)` windows covering all rows in `[start, end)`."""
+        first = self.find_first_data(start, end)
+        if first is None:
+            return []
+        windows = []
+        pending = [(first, end, self.count(first, end))]
+        while pending:
+            window_start, window_end, count = pending.pop()
+            if not count:
+                continue
+            width = window_end - window_start
+            if count <= self.target_rows or width <= self.min_window:
+                windows.append((window_start, window_end, count))
+                continue
+            middle = window_start + width / 2
+            left = self.count(window_start, middle)
+            # Push the later half first so windows come out in time order
+            pending.append((middle, window_end, count - left))
+            pending.append((window_start, middle, left))
+        return self._merge(windows)
+
+    def _merge(
+        self, windows: List[Tuple[datetime.datetime, datetime.datetime, int]]
+    ) -> List[Tuple[datetime.datetime, datetime.datetime, int]]:
+        """Merge neighbouring windows while they stay within the target."""
+        merged: List[Tuple[datetime.datetime, datetime.datetime, int]] = []
+        for window in windows:
+            if merged and merged[-1][2] + window[2] <= self.target_rows:
+                previous = merged.pop()
+                window = (previous[0], window[1], previous[2] + window[2])
+            merged.append(window)
+        return merged
+
+    def plan_with_cache(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        cache: Optional[dict],
+    ) -> Tuple[List[Window], dict]:
+        """Return windows for `[start, end)`, reusing a plan cached in state.
+
+        Windows of a previous plan that lie after `start` are reused as is, so
+        only the period after the previous plan's end is probed again.
+        """
+        windows: List[Tuple[datetime.datetime, datetime.datetime, int]] = []
+        plan_from = start
+        if cache and parse_ts(cache["planned_from"]) <= start:
+            planned_until = parse_ts(cache["planned_until"])
+            for window in cache["windows"]:
+                window_start, window_end = parse_ts(window[0]), parse_ts(window[1])
+                if window_end > start:
+                    windows.append((max(window_start, start), window_end, window[2]))
+            plan_from = max(start, planned_until)
+        if plan_from < end:
+            windows.extend(self.plan(plan_from, end))
+        new_cache = {
+            "planned_from": format_ts(start),
+            "planned_until": format_ts(max(end, plan_from)),
+            "windows": [
+                [format_ts(window_start), format_ts(window_end), count]
+                for window_start, window_end, count in windows
+            ],
+        }
+        return [(window[0], window[1]) for window in windows], new_cache